@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# One command line for every day.
+#
+#   aoc list                        the days that can be run
+#   aoc run 8 --part 2 --full       day 8 part two on the full input
+#   aoc run 6 --module po6-2        a particular variant of a day, both parts on the sample
+#   aoc all --full                  every day in parallel, takes the same options as run_all.py
+#   aoc bench --days 8 9            benchmarks, takes the same options as bench.py
+#
+# Days are registered from their file names (pNN.py and variants like po6-2.py) so nothing is imported
+# until it's run; a day that doesn't use numpy never loads it. Installed as the aoc console script by
+# pyproject.toml, or run this file directly. The days and data/ are found in AOC_ROOT if it's set, else
+# the working directory if it has day files, else next to this file.
+import argparse
+import importlib
+import os
+import re
+import sys
+
+SOLVER_PATTERNS = (re.compile(r'^p(\d\d)\.py$'), re.compile(r'^po(\d)-\d+\.py$'))
+
+
+def is_solver(filename: str) -> bool:
+    return any(pattern.match(filename) for pattern in SOLVER_PATTERNS)
+
+
+def find_root() -> str:
+    # An installed aoc sits in site-packages without the day files, so prefer the checkout it's run from
+    if os.environ.get('AOC_ROOT'):
+        return os.path.abspath(os.environ['AOC_ROOT'])
+    if any(is_solver(x) for x in os.listdir(os.getcwd())):
+        return os.getcwd()
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+ROOT = find_root()
+
+
+def registry() -> dict:
+    # module name -> day number for every solver file, each day's pNN module ahead of its variants
+    rc = {}
+    for filename in sorted(os.listdir(ROOT)):
+        for pattern in SOLVER_PATTERNS:
+            match = pattern.match(filename)
+            if match:
+                rc[filename[:-3]] = int(match.group(1))
+                break
+    return rc
+
+
+def modules_for(day: int) -> list:
+    return [name for name, number in registry().items() if number == day]
+
+
+def run(args) -> int:
+    names = [args.module] if args.module else modules_for(args.day)[:1]
+    if not names or names[0] not in registry():
+        print(f"no solver for day {args.day}" if not args.module else f"no solver module {args.module}")
+        return 1
+    module = importlib.import_module(names[0])
+    if not hasattr(module, 'load_input') or not hasattr(module, 'solve'):
+        print(f"{module.__name__} has no load_input/solve hooks")
+        return 1
+
+    from utils import results
+    for part in args.part or [1, 2]:
+        answer, cached = results.solve(module, registry()[module.__name__], part, sample=not args.full,
+                                       use_cache=not args.no_cache)
+        print(f"{module.__name__} part {part} {'full' if args.full else 'sample'}: {answer}{' (cached)' if cached else ''}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='aoc', description="Advent of Code 2025 solvers")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list the registered days")
+    run_parser = commands.add_parser('run', help="run one day")
+    run_parser.add_argument('day', type=int)
+    run_parser.add_argument('--part', type=int, choices=[1, 2], action='append', help="default is both")
+    run_parser.add_argument('--full', action='store_true', help="use the full input instead of the sample")
+    run_parser.add_argument('--module', help="solver module to use, e.g. po6-2")
+    run_parser.add_argument('--no-cache', action='store_true', help="solve even if the answer is cached")
+    commands.add_parser('all', help="run every day in parallel, see run_all.py --help")
+    commands.add_parser('bench', help="benchmark the solvers, see bench.py --help")
+    argv = sys.argv[1:] if argv is None else argv
+    # all and bench hand the rest of the command line to their own parsers
+    args, rest = parser.parse_known_args(argv) if argv[:1] in (['all'], ['bench']) else (parser.parse_args(argv), [])
+
+    # Solvers open ./data/... and import each other by name, wherever aoc was started from
+    if not registry():
+        print(f"no day files in {ROOT}; run aoc from a checkout or set AOC_ROOT")
+        return 1
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    if args.command == 'list':
+        for name, day in registry().items():
+            print(f"{day:3}  {name}")
+        return 0
+    if args.command == 'run':
+        return run(args)
+    return importlib.import_module('run_all' if args.command == 'all' else 'bench').main(rest)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
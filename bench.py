@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# Benchmark every day's solver on its full input.
+#
+#   ./bench.py                      time every day, append to the history, compare to the baseline
+#   ./bench.py --days 8 9 -n 10     just days 8 and 9, ten timed runs each
+#   ./bench.py --save-baseline      make this run the baseline future runs are compared to
+#
+# A day is any pNN.py (or variant like po6-2.py) that defines load_input(sample) and solve(data, part).
+# Parse time is load_input, solve time is solve; each is the median of the timed runs after warm-up.
+# Peak memory comes from one extra tracemalloc'd run. Exits non-zero if anything regressed.
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from aoc import registry
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(HERE, 'bench_history.json')
+BASELINE_FILE = os.path.join(HERE, 'bench_baseline.json')
+
+
+def discover() -> dict:
+    # module name -> day number, for every solver file that follows the load_input/solve convention
+    return registry()
+
+
+def has_hooks(module) -> bool:
+    return hasattr(module, 'load_input') and hasattr(module, 'solve')
+
+
+def time_part(module, part: int, runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        module.solve(module.load_input(False), part)
+
+    parse_times = []
+    solve_times = []
+    answer = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        data = module.load_input(False)
+        parsed = time.perf_counter()
+        answer = module.solve(data, part)
+        done = time.perf_counter()
+        parse_times.append(parsed - start)
+        solve_times.append(done - parsed)
+
+    tracemalloc.start()
+    module.solve(module.load_input(False), part)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'parse': statistics.median(parse_times),
+        'solve': statistics.median(solve_times),
+        'peak_bytes': peak,
+        'answer': str(answer),
+    }
+
+
+def load_json(filename: str, default):
+    if not os.path.exists(filename):
+        return default
+    with open(filename, 'r') as fh:
+        return json.load(fh)
+
+
+def save_json(filename: str, value):
+    with open(filename, 'w') as fh:
+        json.dump(value, fh, indent=1)
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+    # Keys whose parse + solve time grew by more than threshold (0.2 == 20%) over the baseline
+    rc = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]['parse'] + baseline[key]['solve']
+        after = result['parse'] + result['solve']
+        if before > 0 and after > before * (1 + threshold):
+            rc.append((key, before, after))
+    return rc
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the solvers on their full inputs")
+    parser.add_argument('--days', type=int, nargs='*', help="only these day numbers")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="timed runs per part")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed runs before timing")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown vs baseline, 0.2 == 20%%")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--cached', action='store_true', help="leave the parsed-input cache on (parse times drop to lookups)")
+    args = parser.parse_args(argv)
+
+    os.chdir(HERE)
+    sys.path.insert(0, HERE)
+    import utils
+    utils.PARSE_CACHE = args.cached
+    utils.log.setLevel('WARNING')
+
+    results = {}
+    for name, day in discover().items():
+        if args.days and day not in args.days:
+            continue
+        module = importlib.import_module(name)
+        if not has_hooks(module):
+            print(f"{name}: no load_input/solve, skipped")
+            continue
+        for part in (1, 2):
+            key = f"{name}.{part}"
+            results[key] = time_part(module, part, args.runs, args.warmup)
+            result = results[key]
+            print(f"{key:10} parse {result['parse'] * 1000:9.2f} ms  solve {result['solve'] * 1000:9.2f} ms  "
+                  f"peak {result['peak_bytes'] / 1024:10.1f} KiB  {result['answer']}")
+
+    history = load_json(args.history, [])
+    history.append({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'runs': args.runs, 'results': results})
+    save_json(args.history, history)
+
+    if args.save_baseline:
+        baseline = load_json(args.baseline, {})
+        baseline.update(results)
+        save_json(args.baseline, baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    slow = regressions(results, load_json(args.baseline, {}), args.threshold)
+    for key, before, after in slow:
+        print(f"REGRESSION {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms")
+    return 1 if slow else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,59 +1,151 @@
 #!/usr/bin/env python3
+from itertools import islice
+import random
 
-import logging
-from math import floor
+import numpy as np
 
-from utils import get_data_lines
+from utils import get_all_data, log, assert_expr, zero_pad, tracer
 
-logging.basicConfig(level=logging.DEBUG, format='%(pathname)s(%(lineno)s): %(levelname)s %(message)s')
-log = logging.getLogger()
+DIAL_SIZE = 100
+START_POS = 50
+CHUNK_LINES = 1 << 16
 
 
-def part_one():
+def to_deltas(moves: list) -> np.ndarray:
+    # 'R12' -> +12, 'L7' -> -7
+    return np.array([int(x[1:]) if x[0] == 'R' else -int(x[1:]) for x in moves if x], dtype=np.int64)
 
-    sample_lines, full_lines = get_data_lines(1)
 
-    pos = 50
-    zero_count = 0
-    for move in full_lines:
-        direction = move[0]
-        count = int(move[1:])
-        log.debug(f'{move=} {direction=} {count=}')
-        if direction == 'R':
-            pos = (pos + count) % 100
-        else:
-            pos = (pos - count) % 100
-        if pos == 0:
-            zero_count += 1
-        log.debug(f'{pos=} {zero_count=}')
-    log.info(f'part one {zero_count=}')
+def spin(deltas: np.ndarray, pos: int) -> tuple:
+    # Apply a block of moves starting at pos. Returns (zero landings, zero crossings, final pos).
+    if len(deltas) == 0:
+        return 0, 0, pos
+    ends = pos + np.cumsum(deltas)
+    starts = np.empty_like(ends)
+    starts[0] = pos
+    starts[1:] = ends[:-1]
+    landings = int(np.count_nonzero(ends % DIAL_SIZE == 0))
+    # Right turns pass through (start, end], left turns through [end, start), so shift left turns down one
+    right = deltas > 0
+    low = np.where(right, starts, ends - 1)
+    high = np.where(right, ends, starts - 1)
+    crossings = int((high // DIAL_SIZE - low // DIAL_SIZE).sum())
+    return landings, crossings, int(ends[-1] % DIAL_SIZE)
 
-def two():
-    sample_lines, full_lines = get_data_lines(1)
 
-    pos = 50
-    zero_count = 0
-    for move in full_lines:
-        direction = move[0]
-        count = int(move[1:])
-        log.debug(f'{move=} {direction=} {count=}')
-        old_pos = pos
-        if direction == 'R':
-            pos = pos + count
-            low = old_pos
-            high = pos
-        else:
-            pos = pos - count
-            low = pos - 1
-            high = old_pos - 1
+def chunked(lines, chunk_lines=CHUNK_LINES):
+    lines = iter(lines)
+    while True:
+        chunk = [x.strip() for x in islice(lines, chunk_lines)]
+        if not chunk:
+            return
+        yield chunk
 
-        zero_count_tmp = floor(high / 100) - floor(low / 100)
-        zero_count += zero_count_tmp
-        log.info(f'{move=} {old_pos=} {pos=} {zero_count_tmp=} {zero_count=}')
 
-    log.info(f'part two {zero_count=}')
+def run_dial(chunks, pos=START_POS) -> tuple:
+    # Carry the dial position between chunks so only one chunk is ever in memory
+    landings = 0
+    crossings = 0
+    for chunk in chunks:
+        chunk_landings, chunk_crossings, pos = spin(to_deltas(chunk), pos)
+        landings += chunk_landings
+        crossings += chunk_crossings
+        if tracer.active:
+            tracer("%d moves: %d landings %d crossings, dial at %d", len(chunk), chunk_landings, chunk_crossings, pos)
+    log.debug('landings=%d crossings=%d pos=%d', landings, crossings, pos)
+    return landings, crossings
+
+
+def input_path(problem_number=1, sample=False) -> str:
+    suffix = 's' if sample else ''
+    return f'./data/{zero_pad(problem_number)}{suffix}.txt'
+
+
+def run_path(path: str, chunk_lines=CHUNK_LINES) -> tuple:
+    # Stream the rotation log straight from disk
+    with open(path, 'r') as fh:
+        return run_dial(chunked(fh, chunk_lines))
+
+
+def run_file(problem_number=1, sample=False, chunk_lines=CHUNK_LINES) -> tuple:
+    return run_path(input_path(problem_number, sample), chunk_lines)
+
+
+def part_one(input_data: list) -> int:
+    return run_dial(chunked(input_data))[0]
+
+
+def part_two(input_data: list) -> int:
+    return run_dial(chunked(input_data))[1]
+
+
+def load_input(sample: bool) -> str:
+    # Just the path - solve streams the file in chunks rather than holding (or caching) every line
+    return input_path(1, sample)
+
+
+def solve(data, part: int) -> int:
+    # data is the input's path from load_input, or a list of lines such as a generated input
+    if isinstance(data, str):
+        return run_path(data)[part - 1]
+    return run_dial(chunked(data))[part - 1]
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes n random rotations
+SCALE_N = 25000
+COMPLEXITY = {1: 1.0, 2: 1.0}
+
+
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    return [f"{rng.choice('LR')}{rng.randint(1, 999)}" for _ in range(n)]
+
+
+def test_chunking():
+    # Chunk boundaries must not change the answer
+    _, full, _, _ = get_all_data(1)
+    whole = run_dial(chunked(full))
+    tiny = run_dial(chunked(full, chunk_lines=7))
+    streamed = run_file(chunk_lines=1000)
+    assert_expr("whole == tiny == streamed")
+    # The runner hooks stream from the path too, and give the same answers as the lines
+    hooked = (solve(load_input(False), 1), solve(load_input(False), 2))
+    assert_expr("hooked == whole and load_input(False).endswith('01.txt')")
+
+
+def test_trace_ring():
+    # Traces sit in the ring buffer until dumped, and sampling keeps one in every N per call site
+    sample, _, _, _ = get_all_data(1)
+    tracer.configure(ring_size=4)
+    try:
+        run_dial(chunked(sample, chunk_lines=1))
+        kept = tracer.dump()
+        for idx in range(10):
+            tracer("event %d", idx, every=3)
+        sampled = tracer.dump()
+    finally:
+        tracer.configure()
+    assert_expr("len(kept) == 4 and kept[-1].endswith('1 moves: 0 landings 1 crossings, dial at 32')")
+    assert_expr("[x.split('TRACE ')[1] for x in sampled] == ['event 2', 'event 5', 'event 8']")
+    assert_expr("not tracer.active and tracer.dump() == []")
+
+
+def test_part1():
+    sample, full, answer, _ = get_all_data(1)
+    score = part_one(sample)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_one(full)=}')
+
+
+def test_part2():
+    sample, full, _, answer = get_all_data(1)
+    score = part_two(sample)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_two(full)=}')
 
 
 if __name__ == "__main__":
-    # part_one()
-    two()
\ No newline at end of file
+    test_part1()
+    test_part2()
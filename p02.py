@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr
+import random
+
+from utils import get_all_data, parsed_input, log, assert_expr, IntervalSet, tracer
 
 
 def parse_ranges(input: str) -> list:
@@ -15,8 +17,8 @@ def parse_ranges(input: str) -> list:
         max_rangeval = max(max_rangeval, mv)
         rc.append([lvalue, rvalue])
 
-    log.debug(f'{len(rc)=}')
-    log.info(f"{max_rangeval=} {len(str(max_rangeval))=} digits")
+    log.debug('%d ranges', len(rc))
+    log.info("max_rangeval=%d, %d digits", max_rangeval, len(str(max_rangeval)))
     return rc
 
 
@@ -36,61 +38,119 @@ def is_invalid(id: int) -> bool:
     return True
 
 
-def part_one(input: str) -> int:
-    # Convert the array of range strings into numbers. Maybe generators? I can see part 2 being huge spans.
-    ranges = parse_ranges(input[0])
+def repunit(num_digits: int, period: int) -> int:
+    # The multiplier that repeats a period-digit block out to num_digits, e.g. (6, 2) -> 10101
+    return (10 ** num_digits - 1) // (10 ** period - 1)
+
+
+def periodic_sum(low: int, high: int, num_digits: int, period: int) -> int:
+    # Sum of every num_digits-long number in [low, high] that is a period-digit block repeated.
+    # Those numbers are exactly kernel * repunit for the period-digit kernels, so it's an arithmetic series.
+    multiplier = repunit(num_digits, period)
+    first = max(10 ** (period - 1), -(-low // multiplier))
+    last = min(10 ** period - 1, high // multiplier)
+    if first > last:
+        return 0
+    return multiplier * (first + last) * (last - first + 1) // 2
+
+
+def prime_factors(value: int) -> list:
+    rc = []
+    factor = 2
+    while factor * factor <= value:
+        if value % factor == 0:
+            rc.append(factor)
+            while value % factor == 0:
+                value //= factor
+        factor += 1
+    if value > 1:
+        rc.append(value)
+    return rc
+
+
+def repeated_sum(low: int, high: int, num_digits: int) -> int:
+    # Sum of num_digits-long numbers in [low, high] made of any block repeated two or more times.
+    # Every such number repeats with period num_digits / q for some prime q, and a number that repeats
+    # with two periods also repeats with their gcd, so inclusion-exclusion over the squarefree
+    # products of those primes counts each number exactly once.
+    primes = prime_factors(num_digits)
     score = 0
-    generators = []
-    for item in ranges:
-        tmp = range(item[0], item[1] + 1)
-        generators.append(tmp)
-
-    # Loop over results separately for possible later threading or MP.Pool
-    for generator in generators:
-        for id in generator:
-            if is_invalid(id):
-                log.info(f'invalid id {id=} in {generator=}')
-                score += id
+    for mask in range(1, 1 << len(primes)):
+        divisor = 1
+        for bit, prime in enumerate(primes):
+            if mask & (1 << bit):
+                divisor *= prime
+        sign = 1 if bin(mask).count('1') % 2 else -1
+        score += sign * periodic_sum(low, high, num_digits, num_digits // divisor)
     return score
 
 
-def generate_repeats(kernel, max_len=10) -> list:
-    rc = []
-    for k in range(2, max_len + 1):
-        candidate = str(kernel) * k
-        if len(candidate) <= max_len:
-            rc.append(candidate)
+def split_by_digits(low: int, high: int):
+    # Yield (low, high, num_digits) for each digit-length slice of the inclusive range
+    low = max(low, 1)
+    while low <= high:
+        num_digits = len(str(low))
+        top = min(high, 10 ** num_digits - 1)
+        yield low, top, num_digits
+        low = top + 1
 
-    return rc
+
+def part_one(input: str) -> int:
+    # Invalid IDs are some block repeated exactly twice, so only even digit counts with half-length periods.
+    ranges = IntervalSet(parse_ranges(input[0]))
+    score = 0
+    for low, high in ranges:
+        for lo, hi, num_digits in split_by_digits(low, high):
+            if num_digits % 2 == 0:
+                score += periodic_sum(lo, hi, num_digits, num_digits // 2)
+    return score
 
 
 def part_two(input: str) -> int:
-    # Convert the array of range strings into numbers.
-    str_ranges = parse_ranges(input[0])
+    # Invalid IDs are any block repeated at least twice.
+    ranges = IntervalSet(parse_ranges(input[0]))
     score = 0
-    input_ranges = []
-    for item in str_ranges:
-        input_ranges.append((item[0], item[1] + 1))
-
-    iveseenit = []
-    all_num_strs = [str(x) for x in range(1, 100_000)]
-    for kernel in all_num_strs:
-        if kernel not in iveseenit:
-            search_list = generate_repeats(kernel)
-            iveseenit.extend(search_list)
-            for item in search_list:
-                item_value = int(item)
-                for cur_list in input_ranges:
-                    if item_value in range(cur_list[0], cur_list[1]):
-                        score += item_value
-        else:
-            log.info(f"{score=} {kernel=}")
-
-    log.info(f"final {score=}")
+    for low, high in ranges:
+        for lo, hi, num_digits in split_by_digits(low, high):
+            score += repeated_sum(lo, hi, num_digits)
+            if tracer.active:
+                tracer("%d-%d (%d digits) running score %d", lo, hi, num_digits, score)
 
+    log.info("final score=%d", score)
     return score
 
 
+def load_input(sample: bool) -> list:
+    return parsed_input(2, sample=sample)
+
+
+def solve(data: list, part: int) -> int:
+    return part_one(data) if part == 1 else part_two(data)
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes one line of n random ID ranges
+SCALE_N = 5000
+COMPLEXITY = {1: 1.2, 2: 1.2}
+
+
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    ranges = []
+    for _ in range(n):
+        start = rng.randint(1, 10 ** rng.randint(2, 10))
+        ranges.append(f"{start}-{start + rng.randint(0, 10 ** 6)}")
+    return [','.join(ranges)]
+
+
+def test_brute_force():
+    # Cross-check the closed form against walking every ID in a few awkward ranges
+    for low, high in [(1, 1200), (95, 115), (998, 1012), (111000, 112000), (9_999_990, 10_000_020)]:
+        twice = sum(x for x in range(low, high + 1) if is_invalid(x))
+        repeats = sum(x for x in range(low, high + 1) if (str(x) + str(x)).find(str(x), 1) < len(str(x)))
+        assert_expr("part_one([f'{low}-{high}']) == twice")
+        assert_expr("part_two([f'{low}-{high}']) == repeats")
+
+
 def test_part1():
     sample, full, answer, _ = get_all_data(2)
     dut = part_one(sample)
@@ -101,8 +161,10 @@ def test_part1():
 
 def test_part2():
     sample, full, _, answer = get_all_data(2)
-    dut = part_two(full)
-    # assert_expr('str(dut) == answer[0]')
+    dut = part_two(sample)
+    assert_expr('str(dut) == answer[0]')
+
+    log.info(f'{part_two(full)=}')
 
 
 if __name__ == '__main__':
@@ -1,53 +1,111 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr
+import random
+
+from utils import get_answers, parsed_input, log, assert_expr, timed, tracer
 import numpy as np
 
-def bfi_highest_two(bank: str) -> int:
-    best_score = 0
-    for cur_idx, cur_batt in enumerate(bank):
-        for sec_idx, sec_batt in enumerate(bank[cur_idx + 1:]):
-            candidate = int(cur_batt + sec_batt)
-            best_score = max(best_score, candidate)
-    return best_score
+
+def max_joltage(bank: str, num_batteries: int) -> int:
+    # Largest num_batteries-digit subsequence of the bank, via a monotonic stack. O(n) per bank.
+    # A smaller digit is popped whenever a bigger one arrives and we can still afford to drop digits.
+    drops = len(bank) - num_batteries
+    stack = []
+    for digit in bank:
+        while drops and stack and stack[-1] < digit:
+            stack.pop()
+            drops -= 1
+        stack.append(digit)
+    return int(''.join(stack[:num_batteries]))
+
+
+def load_banks(data: list) -> np.ndarray:
+    # All banks as one (num_banks, bank_len) uint8 array of digit values. Banks must be the same length.
+    raw = ''.join(data).encode('ascii')
+    return np.frombuffer(raw, dtype=np.uint8).reshape(len(data), -1) - ord('0')
+
+
+@timed
+def max_joltages(banks: np.ndarray, num_batteries: int) -> np.ndarray:
+    # Batch version of max_joltage - the same stack, run over every bank at once, one column per step.
+    # Columns and stack slots are laid out bank-minor so each step touches contiguous memory, and the
+    # pop loop only revisits the banks that popped last time round.
+    num_banks, bank_len = banks.shape
+    columns = np.ascontiguousarray(banks.T)
+    stack = np.zeros(num_batteries * num_banks, dtype=np.uint8)
+    depth = np.zeros(num_banks, dtype=np.int64)
+    drops = np.full(num_banks, bank_len - num_batteries, dtype=np.int64)
+    all_banks = np.arange(num_banks)
+    for col in range(bank_len):
+        digit = columns[col]
+        active = all_banks
+        while len(active):
+            cur_depth = depth[active]
+            top = stack[np.maximum(cur_depth - 1, 0) * num_banks + active]
+            pop = (cur_depth > 0) & (drops[active] > 0) & (top < digit[active])
+            active = active[pop]
+            depth[active] -= 1
+            drops[active] -= 1
+        # A full stack means the digit is dropped instead of pushed
+        push = depth < num_batteries
+        idx = np.flatnonzero(push)
+        stack[depth[idx] * num_banks + idx] = digit[idx]
+        depth += push
+        drops -= ~push
+        if tracer.active:
+            tracer("column %d: %d banks still dropping", col, np.count_nonzero(drops), every=10)
+    powers = 10 ** np.arange(num_batteries - 1, -1, -1, dtype=np.int64)
+    return powers @ stack.reshape(num_batteries, num_banks).astype(np.int64)
+
+
+def total_joltage(banks: np.ndarray, num_batteries: int) -> int:
+    joltages = max_joltages(banks, num_batteries)
+    log.debug("%d banks", len(joltages))
+    return sum(joltages.tolist())
 
 
-def part_one(data) -> int:
-    score = 0
-    for bank in data:
-        max_joltage = bfi_highest_two(bank)
-        score += max_joltage
-        log.debug(f"{bank=} {max_joltage} {score=}")
-    return score
+def part_one(banks: np.ndarray) -> int:
+    return total_joltage(banks, 2)
 
 
-def part_two(data) -> int:
-    return 0
+def part_two(banks: np.ndarray) -> int:
+    return total_joltage(banks, 12)
 
 
-def helper(ad,cur_num_left_to_find):
-    #cur_num_left_to_find how many digits we must find after finding the current digit.
-    simplify = ad[:len(ad)-cur_num_left_to_find]
-    digis, firstlocs, couns = np.unique(simplify, return_index=True, return_counts=True, sorted=True)
-    best_digit = digis[-1]
-    best_loc = firstlocs[-1]
-    return best_digit, ad[best_loc+1:]
+def load_input(sample: bool) -> np.ndarray:
+    return parsed_input(3, load_banks, sample=sample)
 
 
-def find_joltage(bank, num_batteries):
-    jlist = []
-    newbank = [x for x in bank]
-    for i in range(num_batteries-1, -1, -1):
-        bd, newbank = helper(newbank,i)
-        jlist.append(bd)
+def solve(banks: np.ndarray, part: int) -> int:
+    return part_one(banks) if part == 1 else part_two(banks)
 
-    rc = int(''.join(jlist))
-    log.debug(f'joltage={rc}')
 
-    return rc
+# Scaling hooks, see test_scaling.py: generate(n) makes n random 100-battery banks
+SCALE_N = 2000
+COMPLEXITY = {1: 1.0, 2: 1.0}
+
+
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    return [''.join(rng.choices('123456789', k=100)) for _ in range(n)]
+
+
+def from_lines(lines: list) -> np.ndarray:
+    return load_banks(lines)
+
+
+def test_batch_matches_scalar():
+    full = parsed_input(3, sample=False)
+    banks = parsed_input(3, load_banks, sample=False)
+    for num_batteries in (1, 2, 5, 12):
+        batch = max_joltages(banks, num_batteries).tolist()
+        scalar = [max_joltage(bank, num_batteries) for bank in full]
+        assert_expr("batch == scalar")
 
 
 def test_part1():
-    sample, full, answer, _ = get_all_data(3)
+    answer, _ = get_answers(3)
+    sample = parsed_input(3, load_banks, sample=True)
+    full = parsed_input(3, load_banks, sample=False)
     dut = part_one(sample)
     assert_expr("str(dut) == answer[0]")
     log.info("Doing full dataset")
@@ -56,22 +114,16 @@ def test_part1():
 
 
 def test_part2():
-    sample, full, _, answer = get_all_data(3)
-
-    score = 0
-    for bank in sample:
-        score += int(find_joltage(bank, 12))
-    log.info(f'{score=}')
-    # dut = part_two(sample)
+    _, answer = get_answers(3)
+    sample = parsed_input(3, load_banks, sample=True)
+    full = parsed_input(3, load_banks, sample=False)
+    score = part_two(sample)
     assert_expr("str(score) == answer[0]")
     log.info("Doing full dataset")
     # if we got here, we can proceed to the full data set
-    score = 0
-    for bank in full:
-        score += int(find_joltage(bank, 12))
-    log.info(f'{score=}')
+    log.info(f'{part_two(full)=}')
 
 
 if __name__ == '__main__':
     test_part1()
-    test_part2()
\ No newline at end of file
+    test_part2()
@@ -1,107 +1,105 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr, load_2d_arrays, dimensions, print_2d_array
-
-def score_cell(cell: str) -> int:
-    if cell == '@':
-        return 1
-    return 0
-
-
-def adj_roll_count(inp_data:list, row: int, col: int) -> int:
-    # Count of rolls found in the adjacent 8 cells
-    num_rows, num_cols = dimensions(inp_data)
-    count = 0
-    # UL
-    if row > 0 and col > 0:
-        count += score_cell(inp_data[row - 1][col - 1])
-    # Up
-    if row > 0:
-        count += score_cell(inp_data[row - 1][col])
-    # UR
-    if row > 0 and col < (num_cols - 1):
-        count += score_cell(inp_data[row - 1][col + 1])
-    # R
-    if col < (num_cols - 1):
-        count += score_cell(inp_data[row][col + 1])
-    # RD
-    if row < (num_rows - 1) and col < (num_cols - 1):
-        count += score_cell(inp_data[row + 1][col + 1])
-    # D
-    if row < (num_rows - 1):
-        count += score_cell(inp_data[row + 1][col])
-    # DL
-    if row < (num_rows - 1) and col > 0:
-        count += score_cell(inp_data[row + 1][col - 1])
-    # L
-    if col > 0:
-        count += score_cell(inp_data[row][col - 1])
-    return count
-
-
-def part_one(input_data: list) -> int:
-    num_rows, num_cols = dimensions(input_data)
-    score = 0
-    for current_row in range(num_rows):
-        for current_col in range(num_cols):
-            if input_data[current_row][current_col] == '.':
-                continue
-            if adj_roll_count(input_data, current_row, current_col) < 4:
-                score += 1
-                log.debug(f"x at {current_row=}, {current_col=}")
-    log.info(f"{score=}")
-    return score
+from math import isqrt
+import random
+
+import numpy as np
+
+from utils import get_all_data, log, assert_expr, Data2D, NEIGHBORS_8, timed, tracer
+
+ROLL = '@'
+
 
+def load(sample: bool) -> Data2D:
+    grid = Data2D()
+    grid.load(4, sample=sample)
+    return grid
 
-def total_roll_count(input_data: list) -> int:
-    num_rows, num_cols = dimensions(input_data)
-    score = 0
-    for row in range(num_rows):
-        for col in range(num_cols):
-            if input_data[row][col] == '@':
-                score += 1
+
+def part_one(grid: Data2D) -> int:
+    # A roll is accessible with fewer than four rolls in the eight cells around it
+    score = int((grid.mask(ROLL) & (grid.neighbor_count(ROLL) < 4)).sum())
+    log.info("score=%d", score)
     return score
 
 
-def part_two(input_data: list) -> int:
-    num_rows, num_cols = dimensions(input_data)
-    initial_count = total_roll_count(input_data)
+@timed
+def peel(grid: Data2D, min_neighbors=4) -> list:
+    # Repeatedly remove every roll with fewer than min_neighbors adjacent rolls, k-core style.
+    # Neighbor counts are computed once; removing a roll only decrements and re-checks its eight
+    # neighbors, so the whole thing is O(cells). Returns the number of rolls removed in each wave.
+    # Work on a flat grid with a one-cell border so neighbor offsets never need bounds checks
+    width = grid.num_cols() + 2
+    offsets = [d_row * width + d_col for d_row, d_col in NEIGHBORS_8]
+    is_roll = np.pad(grid.mask(ROLL), 1).ravel().tolist()
+    counts = np.pad(grid.neighbor_count(ROLL), 1).ravel().astype(int).tolist()
+    rolls = [idx for idx, roll in enumerate(is_roll) if roll]
+
+    wave = [idx for idx in rolls if counts[idx] < min_neighbors]
+    for idx in wave:
+        is_roll[idx] = False
+
+    waves = []
+    while wave:
+        waves.append(len(wave))
+        if tracer.active:
+            tracer("wave %d removes %d rolls", len(waves), len(wave))
+        next_wave = []
+        for idx in wave:
+            for offset in offsets:
+                neighbor = idx + offset
+                if is_roll[neighbor]:
+                    counts[neighbor] -= 1
+                    if counts[neighbor] < min_neighbors:
+                        # Mark it as removed now so it's only queued once
+                        is_roll[neighbor] = False
+                        next_wave.append(neighbor)
+        wave = next_wave
+
+    log.debug("waves=%s", waves)
+    return waves
+
+
+def part_two(grid: Data2D) -> int:
+    waves = peel(grid)
+    log.info("part two: %d waves", len(waves))
+    return sum(waves)
+
+
+def load_input(sample: bool) -> Data2D:
+    return load(sample)
+
+
+def solve(grid: Data2D, part: int) -> int:
+    return part_one(grid) if part == 1 else part_two(grid)
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes a square grid of about n cells, mostly rolls
+SCALE_N = 40000
+COMPLEXITY = {1: 1.0, 2: 1.0}
+
 
-    score = 0
-    for current_row in range(num_rows):
-        for current_col in range(num_cols):
-            if input_data[current_row][current_col] == '.':
-                continue
-            if adj_roll_count(input_data, current_row, current_col) < 4:
-                score += 1
-                # Mark it as removed
-                input_data[current_row][current_col] = '.'
-                log.debug(f"x at {current_row=}, {current_col=}")
-    log.info(f"part two {score=}")
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    width = max(isqrt(n), 1)
+    return [''.join(ROLL if rng.random() < 0.7 else '.' for _ in range(width)) for _ in range(width)]
 
-    # print_2d_array(input_data)
 
-    while True:
-        score = 0
-        log.info(f"{total_roll_count(input_data)=}")
-        for current_row in range(num_rows):
-            for current_col in range(num_cols):
-                if input_data[current_row][current_col] == '.':
-                    continue
-                if adj_roll_count(input_data, current_row, current_col) < 4:
-                    score += 1
-                    # Mark it as removed
-                    input_data[current_row][current_col] = '.'
-        log.info(f"part two {score=}")
+def from_lines(lines: list) -> Data2D:
+    grid = Data2D()
+    grid.load_lines(lines)
+    return grid
 
-        if score <= 0:
-            break
 
-    return initial_count - total_roll_count(input_data)
+def test_waves():
+    sample = load(True)
+    waves = peel(sample)
+    assert_expr("waves == [13, 12, 7, 5, 2, 1, 1, 1, 1]")
+    assert_expr("waves[0] == part_one(sample)")
 
 
 def test_part1():
     _, _, s_answer, _ = get_all_data(4)
-    sample, full = load_2d_arrays(4)
+    sample, full = load(True), load(False)
     score = part_one(sample)
     assert_expr("str(score) == s_answer[0]")
     log.info("Doing full dataset")
@@ -111,7 +109,7 @@ def test_part1():
 
 def test_part2():
     _, _, _, answer = get_all_data(4)
-    sample, full = load_2d_arrays(4)
+    sample, full = load(True), load(False)
     score = part_two(sample)
     assert_expr("str(score) == answer[0]")
     log.info("** Doing full dataset **")
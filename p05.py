@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr
+import random
+
+from utils import get_answers, parsed_input, log, assert_expr, IntervalSet
 
 
 def parse_data(inp_data: list) -> tuple:
@@ -19,72 +21,66 @@ def parse_data(inp_data: list) -> tuple:
     return ranges, ingredients
 
 
-def in_range(ingr: int, irange: tuple) -> int:
-    if irange[0] <= ingr <= irange[1]:
-        return 1
-    return 0
+def part_one(fresh_ranges: list, ingredient_ids: list) -> int:
+    fresh = IntervalSet(fresh_ranges)
+    return int(fresh.contains_many(ingredient_ids).sum())
 
 
-def part_one(fresh_ranges: list, ingredient_ids: list) -> int:
-    score = 0
-    for ingr in ingredient_ids:
-        rcs = [in_range(ingr, x) for x in fresh_ranges]
-        score += any(rcs)
+def part_two(start_ranges: list) -> int:
+    # Overlapping ranges are merged when the set is built, so the covered length is the answer
+    fresh = IntervalSet(start_ranges)
+    log.info('%d ranges merged into %d', len(start_ranges), len(fresh))
+    return fresh.total_length()
 
-    return score
 
+def load_input(sample: bool) -> tuple:
+    return parsed_input(5, parse_data, sample=sample)
+
+
+def solve(data: tuple, part: int) -> int:
+    fresh_ranges, ingredient_ids = data
+    return part_one(fresh_ranges, ingredient_ids) if part == 1 else part_two(fresh_ranges)
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes n random fresh ranges and n ingredient IDs
+SCALE_N = 10000
+COMPLEXITY = {1: 1.2, 2: 1.2}
+
+
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    ranges = []
+    for _ in range(n):
+        start = rng.randint(1, 10 ** 14)
+        ranges.append(f"{start}-{start + rng.randint(0, 10 ** 11)}")
+    return ranges + [''] + [str(rng.randint(1, 10 ** 14)) for _ in range(n)]
 
-def part_two(start_ranges: list) -> int:
-    fresh_ranges = [x for x in start_ranges]
-    fresh_ranges.sort(key=lambda x: x[0])
-
-    final_fresh = []
-    while(len(fresh_ranges)> 1):
-
-        bp = 0
-        #Find the break index for sets that overlap the first set and those that don't
-        for i in range(1,len(fresh_ranges)):
-            if fresh_ranges[i][0] <= fresh_ranges[0][1]:
-                bp = i
-        #If there are no sets overlapping the first set, save the first set aside and then loop over remaining list
-        if bp == 0:
-            final_fresh.append(fresh_ranges[0])
-            fresh_ranges = fresh_ranges[1:]
-        #Take all of the overlapping sets (i.e. the first bp+1 things on the list) and merge into one set.
-        #Replace the overlapping sets with the one set on the list and then send back to loop.
-        else:
-            new_start = (fresh_ranges[0][0],max([fresh_ranges[i][1] for i in range(bp+1)]))
-            fresh_ranges = [new_start]+fresh_ranges[bp+1:]
-    final_fresh.extend(fresh_ranges)
 
-    score = 0
-    for cur_range in final_fresh:
-        score += (cur_range[1] - cur_range[0]) + 1
-    log.info(f"{final_fresh=}")
-    return score
+def from_lines(lines: list) -> tuple:
+    return parse_data(lines)
 
 
 def test_part1():
-    sample, full, answer, _ = get_all_data(5)
+    answer, _ = get_answers(5)
     # Split data into fresh ranges and ingredients
-    fresh_ranges, ingredient_ids = parse_data(sample)
+    fresh_ranges, ingredient_ids = parsed_input(5, parse_data, sample=True)
     score = part_one(fresh_ranges, ingredient_ids)
     assert_expr("str(score) == answer[0]")
     log.info("** Doing full dataset **")
     # if we got here, we can proceed to the full data set
-    fresh_ranges, ingredient_ids = parse_data(full)
+    fresh_ranges, ingredient_ids = parsed_input(5, parse_data, sample=False)
     log.info(f'{part_one(fresh_ranges, ingredient_ids)=}')
 
 
 def test_part2():
-    sample, full, _, answer = get_all_data(5)
-    fresh_ranges, _ = parse_data(sample)
+    _, answer = get_answers(5)
+    fresh_ranges, _ = parsed_input(5, parse_data, sample=True)
     score = part_two(fresh_ranges)
     assert_expr("str(score) == answer[0]")
     log.info("** Doing full dataset **")
     # if we got here, we can proceed to the full data set
     log.info(f'{score=}')
-    fresh_ranges, _ = parse_data(full)
+    fresh_ranges, _ = parsed_input(5, parse_data, sample=False)
     score = part_two(fresh_ranges)
     log.info(f'full {score=}')
 
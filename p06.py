@@ -1,103 +1,157 @@
 #!/usr/bin/env python3
-import pandas as pd
+import random
+
 import numpy as np
 
+from utils import get_all_data, log, assert_expr, zero_pad, reduce_blocks, timed
+
+SPACE = ord(' ')
+ZERO = ord('0')
+
+
+def load_worksheet(problem_number=6, sample=True) -> np.ndarray:
+    # Read the worksheet once and view it as a 2D uint8 array, one byte per character.
+    # When every line is the same length this is a zero-copy view of the file contents; ragged
+    # lines (the sample trims trailing blanks) are padded with spaces first.
+    suffix = 's' if sample else ''
+    with open(f'./data/{zero_pad(problem_number)}{suffix}.txt', 'rb') as fh:
+        return worksheet_grid(fh.read())
+
+
+def worksheet_grid(raw: bytes) -> np.ndarray:
+    lines = raw.rstrip(b'\n').split(b'\n')
+    width = max(len(x) for x in lines)
+    if raw.endswith(b'\n') and len(raw) == len(lines) * (width + 1):
+        return np.frombuffer(raw, dtype=np.uint8).reshape(len(lines), width + 1)[:, :width]
+    padded = b''.join(x.ljust(width) for x in lines)
+    return np.frombuffer(padded, dtype=np.uint8).reshape(len(lines), width)
+
+
+def place_values(digits: np.ndarray, places: np.ndarray) -> np.ndarray:
+    # Each digit times 10 ** its place, with spaces contributing nothing
+    is_digit = digits != SPACE
+    return np.where(is_digit, (digits.astype(np.int64) - ZERO) * 10 ** np.maximum(places, 0), 0)
+
+
+def read_numbers(digits: np.ndarray) -> np.ndarray:
+    # Read each row of a 2D character array as one number, left to right, skipping spaces.
+    # A digit's place is the number of digits to its right in the same row.
+    places = np.cumsum(digits[:, ::-1] != SPACE, axis=1)[:, ::-1] - 1
+    return place_values(digits, places).sum(axis=1)
+
+
+@timed
+def parse_worksheet(grid: np.ndarray) -> tuple:
+    # Split the worksheet into problems and return operand blocks for both readings:
+    #   rows    - each problem's numbers written left to right (part one)
+    #   columns - each problem's numbers written top to bottom, cephalopod style (part two)
+    # Each is a tuple of (flat int64 operands, block start offsets, operator per block).
+    digits = grid[:-1]
+    # One reduction finds the all-blank separator columns; problems are the runs between them
+    blank = (grid == SPACE).all(axis=0)
+    used = ~blank
+    starts = np.flatnonzero(used & ~np.concatenate(([False], used[:-1])))
+    ops = grid[-1, starts].tobytes().decode()
+
+    # Row numbers: per-digit place values restricted to their own block, then summed per block
+    is_digit = digits != SPACE
+    block_of = np.cumsum(np.isin(np.arange(grid.shape[1]), starts)) - 1
+    right = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1]
+    ends = np.append(starts[1:], grid.shape[1])
+    right_of_block = np.zeros((digits.shape[0], grid.shape[1] + 1), dtype=right.dtype)
+    right_of_block[:, :-1] = right
+    places = right - right_of_block[:, ends[block_of]] - 1
+    row_values = np.add.reduceat(place_values(digits, places), starts, axis=1)
+    row_operands = row_values.T.ravel()
+    row_offsets = np.arange(len(starts)) * digits.shape[0]
+
+    # Column numbers: transpose so each character column becomes one number
+    col_values = read_numbers(digits.T)
+    col_operands = col_values[used]
+    col_offsets = np.cumsum(used)[starts] - 1
+
+    return (row_operands, row_offsets, ops), (col_operands, col_offsets, ops)
+
+
+def evaluate(blocks: tuple) -> int:
+    # Grand total of every problem; the per-block results are exact Python ints
+    return sum(reduce_blocks(*blocks))
+
+
+def part_one(sample: bool) -> int:
+    rows, _ = parse_worksheet(load_worksheet(sample=sample))
+    score = evaluate(rows)
+    log.info('sample=%s score=%d', sample, score)
+    return score
+
+
+def part_two(sample: bool) -> int:
+    _, columns = parse_worksheet(load_worksheet(sample=sample))
+    score = evaluate(columns)
+    log.info('part two sample=%s score=%d', sample, score)
+    return score
+
+
+def load_input(sample: bool) -> tuple:
+    return parse_worksheet(load_worksheet(sample=sample))
+
+
+def solve(data: tuple, part: int) -> int:
+    # data is the (rows, columns) pair of operand blocks
+    return evaluate(data[part - 1])
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes a worksheet of n problems
+SCALE_N = 10000
+COMPLEXITY = {1: 1.0, 2: 1.0}
+
+
+def generate(n: int, seed=0, num_operands=4) -> list:
+    # Each problem is a block up to four digits wide, its numbers all pushed to the left or all to
+    # the right, with a blank column between problems
+    rng = random.Random(seed)
+    rows = [[] for _ in range(num_operands + 1)]
+    for _ in range(n):
+        width = rng.randint(1, 4)
+        align = str.ljust if rng.random() < 0.5 else str.rjust
+        lengths = [rng.randint(1, width) for _ in range(num_operands)]
+        lengths[rng.randrange(num_operands)] = width
+        for row, length in zip(rows, lengths):
+            row.append(align(''.join(rng.choices('123456789', k=length)), width))
+        rows[-1].append(rng.choice('+*').ljust(width))
+    return [' '.join(row) for row in rows]
+
+
+def from_lines(lines: list) -> tuple:
+    return parse_worksheet(worksheet_grid(('\n'.join(lines) + '\n').encode()))
+
 
+def test_parse_worksheet():
+    rows, columns = parse_worksheet(load_worksheet(sample=True))
+    row_operands = rows[0].tolist()
+    col_operands = columns[0].tolist()
+    assert_expr("row_operands == [123, 45, 6, 328, 64, 98, 51, 387, 215, 64, 23, 314]")
+    assert_expr("rows[1].tolist() == [0, 3, 6, 9] and rows[2] == '*+*+'")
+    assert_expr("col_operands == [1, 24, 356, 369, 248, 8, 32, 581, 175, 623, 431, 4]")
+    assert_expr("columns[1].tolist() == [0, 3, 6, 9]")
 
-def part_one():
-    sdf = pd.read_csv('data/06s.txt', header=None, delimiter=r'\s+', skipfooter=1).T
-    print(sdf.head())
-    # Now we need to operators row
-    sof = pd.read_csv('data/06s.txt', header=None, delimiter=r'\s+', skiprows=sdf.shape[1]).T
-    print(sof.head())
-
-    sdf['oper'] = sof[0]
-    sum_score = sdf[sdf.oper == '+'][sdf.columns[:-1]].sum(axis=1).sum()
-    prod_score = sdf[sdf.oper == '*'][sdf.columns[:-1]].prod(axis=1).sum()
-    score = sum_score + prod_score
-    print(score)
-
-    sdf = pd.read_csv('data/06.txt', header=None, delimiter=r'\s+', skipfooter=1).T
-    print(sdf.head())
-    # Now we need to operators row
-    sof = pd.read_csv('data/06.txt', header=None, delimiter=r'\s+', skiprows=sdf.shape[1]).T
-    print(sof.head())
-
-    sdf['oper'] = sof[0]
-    sum_score = sdf[sdf.oper == '+'][sdf.columns[:-1]].sum(axis = 1).sum()
-    prod_score = sdf[sdf.oper == '*'][sdf.columns[:-1]].prod(axis = 1).sum()
-    score = sum_score + prod_score
-    print(score)
-
-
-def part_two():
-    ###
-    # Sample Data
-    ###
-    #Get the data which will be as strings
-    xdf = pd.read_csv('data/06s.txt', header=None, skipfooter=1)
-    #Turn said strings into an array
-    pinf = xdf.values.flatten()
-    #For the sample data we need to add spaces at the end.  This is not necessary for the regular data.
-    pinf[0] = pinf[0] + ' '
-    pinf[1] = pinf[1] + ' '
-    #Split the strings into individual components, which creates a 2d array
-    garg = np.array([list(x) for x in pinf])
-    print(garg)
-    #To do this the cephlapod way we must join the strings going down into single strings
-    pick = np.apply_along_axis(lambda x: ''.join(x), 0, garg)
-    print(pick)
-    #Remove the spacers, return into ints, and reshape into the correct number of rows.  We are not even pretending
-    #that we are making this generalizable.
-    ceph = np.array([int(x) for x in pick if x != '   ']).reshape((-1,3))
-    print(ceph)
-
-    sdf = pd.DataFrame(ceph)
-    print(sdf.head)
-    sof = pd.read_csv('data/06s.txt', header=None, delimiter=r'\s+', skiprows=sdf.shape[1]).T
-    print(sof.head())
-    sdf['oper'] = sof[0]
-    sum_score = sdf[sdf.oper == '+'][sdf.columns[:-1]].sum(axis = 1).sum()
-    prod_score = sdf[sdf.oper == '*'][sdf.columns[:-1]].prod(axis = 1).sum()
-    score = sum_score + prod_score
-    print(score)
-
-    ###
-    # Full Data
-    ###
-    #Get the data which will be as strings
-    xdf = pd.read_csv('data/06.txt', header=None, skipfooter=1)
-    #Turn said strings into an array
-    pinf = xdf.values.flatten()
-    #Split the strings into individual components, which creates a 2d array
-    garg = np.array([list(x) for x in pinf])
-    print(garg)
-    #To do this the cephlapod way we must join the strings going down into single strings
-    pick = np.apply_along_axis(lambda x: ''.join(x), 0, garg)
-    print(pick)
-    #So, because we don't have consistent lengths of the numbers, we can't use reshape like we did for the sample.
-    #Deviating sideways
-    #
-    #Creating arrays to which we will need to apply each operator
-    sub_pick = np.array_split(pick,np.where(pick=='    ')[0])
-    #And then because each of these has the '   ' at the start except the first...
-    hysup = [sub_pick[0]] + [x[1:] for x in sub_pick[1:]]
-    #Converting to ints
-    ceph = [x.astype('int') for x in hysup]
-
-    sdf = pd.DataFrame(ceph) #And this will had NaN's where ever there are blanks... So hopefully this works.  Fingers crossed.
-    print(sdf.head())
-    sof = pd.read_csv('data/06.txt', header=None, delimiter=r'\s+', skiprows=sdf.shape[1]).T
-    print(sof.head())
-    sdf['oper'] = sof[0]
-    sum_score = sdf[sdf.oper == '+'][sdf.columns[:-1]].sum(axis = 1).sum()
-    prod_score = sdf[sdf.oper == '*'][sdf.columns[:-1]].prod(axis = 1).sum()
-    score = sum_score + prod_score
-    print(score)
 
+def test_part1():
+    _, _, answer, _ = get_all_data(6)
+    score = part_one(True)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_one(False)=}')
 
 
+def test_part2():
+    _, _, _, answer = get_all_data(6)
+    score = part_two(True)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_two(False)=}')
 
 
 if __name__ == '__main__':
-    part_one()
\ No newline at end of file
+    test_part1()
+    test_part2()
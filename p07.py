@@ -1,99 +1,131 @@
-from utils import Data2D, log, assert_expr
+#!/usr/bin/env python3
+from collections import defaultdict
+from math import isqrt
+import random
+
+from utils import get_all_data, log, assert_expr, zero_pad, tracer
 
 
 START = 'S'
 SPLITTER = '^'
 BLANK = '.'
-BEAM = '|'
-
-
-def findall(inp: str, character: str) -> list:
-    rc = []
-    cur_start = 0
-    while True:
-        tmp = inp.find(character, cur_start)
-        if tmp < 0:
-            break
-        rc.append(tmp)
-        cur_start = tmp + 1
-        if cur_start >= len(inp):
-            break
-    return rc
 
 
-def as_str(inp: list) -> str:
-    return ''.join(inp)
+def run_manifold(lines) -> tuple:
+    # Single streaming pass over the manifold, one row at a time. Only the columns that currently
+    # carry a beam are kept, mapped to the number of timelines in that column.
+    # Returns (number of splits, number of timelines).
+    beams = {}
+    splits = 0
+    for line in lines:
+        if not beams:
+            start_col = line.find(START)
+            if start_col >= 0:
+                beams = {start_col: 1}
+            continue
+        if SPLITTER not in line:
+            continue
+        next_beams = defaultdict(int)
+        for col, timelines in beams.items():
+            # A beam split off the edge is carried along as a timeline but never looked up in a row,
+            # where line[-1] would wrap round to the far side
+            if 0 <= col < len(line) and line[col] == SPLITTER:
+                splits += 1
+                next_beams[col - 1] += timelines
+                next_beams[col + 1] += timelines
+            else:
+                next_beams[col] += timelines
+        beams = next_beams
+        if tracer.active:
+            tracer("%d splits so far, %d active columns", splits, len(beams), every=10)
+
+    log.debug("splits=%d, %d active columns", splits, len(beams))
+    return splits, sum(beams.values())
+
+
+def input_path(sample: bool, problem_number=7) -> str:
+    suffix = 's' if sample else ''
+    return f'./data/{zero_pad(problem_number)}{suffix}.txt'
+
+
+def run_path(path: str) -> tuple:
+    with open(path, 'r') as fh:
+        return run_manifold(fh)
+
+
+def run_file(sample: bool, problem_number=7) -> tuple:
+    return run_path(input_path(sample, problem_number))
 
 
 def part_one(sample: bool) -> int:
-    data = Data2D()
-    data.load(7, sample=sample, strip=True)
-    data.add_padding(BLANK)
-    # print(sample)
-
-    # Find starting point
-    start_col = as_str(data[1]).index(START)
-    data[2][start_col] = BEAM
-
-    score = 0
-    for idx in range(2, data.num_rows() - 1):
-        # print(sample)
-        splitters = findall(as_str(data[idx]), SPLITTER)
-
-        for splitter in splitters:
-            if data[idx - 1][splitter] == BEAM:
-                score += 1
-                if data[idx - 1][splitter - 1] == BLANK:
-                    data[idx][splitter - 1] = BEAM
-
-                if data[idx - 1][splitter + 1] == BLANK:
-                    data[idx][splitter + 1] = BEAM
-        # print(idx,sba)
-
-        beams = findall(as_str(data[idx]), BEAM)
-        for beam in beams:
-            if data[idx + 1][beam] == BLANK:
-                data[idx + 1][beam] = BEAM
-
-    log.info(f"sample {score=}")
+    score = run_file(sample)[0]
+    log.info("sample=%s score=%d", sample, score)
     return score
 
 
 def part_two(sample: bool) -> int:
-    data = Data2D()
-    data.load(7, sample=sample, strip=True)
-    data.add_padding(BLANK)
-    # print(sample)
-
-    # Find starting point
-    start_col = as_str(data[1]).index(START)
-    data[2][start_col] = BEAM
-    routes = [0 for i in range(data.num_cols())]
-    routes[start_col] = 1
-
-
-
-    score = 0
-    for idx in range(3, data.num_rows() - 1,2):
-        # print(sample)
-        splitters = findall(as_str(data[idx]), SPLITTER)
-        after_routes = routes.copy()
-        for splitter in splitters:
-            after_routes[splitter - 1] += routes[splitter]
-            after_routes[splitter + 1] += routes[splitter]
-            after_routes[splitter] = 0
-        # print(idx,after_routes)
-        routes = [x for x in after_routes]
-
-    score = sum(routes)
-
-    log.info(f"part two sample {score=}")
+    score = run_file(sample)[1]
+    log.info("part two sample=%s score=%d", sample, score)
     return score
 
 
-if __name__ == '__main__':
-    part_one(True)
-    part_one(False)
+def load_input(sample: bool) -> str:
+    # Just the path - solve streams the manifold a row at a time rather than holding (or caching) it
+    return input_path(sample)
+
+
+def solve(data, part: int) -> int:
+    # data is the input's path from load_input, or a list of lines such as a generated input
+    if isinstance(data, str):
+        return run_path(data)[part - 1]
+    return run_manifold(data)[part - 1]
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes a square manifold of about n cells
+SCALE_N = 100000
+COMPLEXITY = {1: 1.0, 2: 1.0}
+
 
-    part_two(True)
-    part_two(False)
\ No newline at end of file
+def generate(n: int, seed=0) -> list:
+    # Like the real input: the start on the top row, then splitters on every other row. Splitters stay
+    # off the edge columns so a split beam never leaves the manifold.
+    rng = random.Random(seed)
+    width = max(isqrt(n), 3)
+    rows = [BLANK * (width // 2) + START + BLANK * (width - width // 2 - 1)]
+    for row in range(1, width):
+        cells = [BLANK] * width
+        if row % 2 == 0:
+            for col in range(1, width - 1):
+                if rng.random() < 0.5:
+                    cells[col] = SPLITTER
+        rows.append(''.join(cells))
+    return rows
+
+
+def test_edge_splitters():
+    # The beam split off the left edge must not reach the splitter on the right edge
+    score = run_manifold(['S....', '.....', '^....', '.....', '....^', '.....'])
+    assert_expr("score == (1, 2)")
+    score = run_manifold(['....S', '.....', '....^', '.....', '^....', '.....'])
+    assert_expr("score == (1, 2)")
+
+
+def test_part1():
+    _, _, answer, _ = get_all_data(7)
+    score = part_one(True)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_one(False)=}')
+
+
+def test_part2():
+    _, _, _, answer = get_all_data(7)
+    score = part_two(True)
+    assert_expr("str(score) == answer[0]")
+    log.info("Doing full dataset")
+    log.info(f'{part_two(False)=}')
+
+
+if __name__ == '__main__':
+    test_part1()
+    test_part2()
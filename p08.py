@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr
-from math import sqrt
-import numpy as np
+import heapq
+import random
+
+from utils import get_answers, parsed_input, log, assert_expr, product, DisjointSet, KDTree, tracer
+
+FIRST_BATCH = 4
 
 
 def parse(input_data: list) -> list:
@@ -14,127 +17,153 @@ def parse(input_data: list) -> list:
     return rc
 
 
-def distance(a: tuple, b: tuple) -> float:
-    diffs = [a[x] - b[x] for x in range(3)]
-    dsquared = [x * x for x in diffs]
-    dist = sqrt(sum(dsquared))
-    return dist
-
-
-def same(a: tuple, b: tuple) -> bool:
-    return all([a[x] == b[x] for x in range(3)])
-
-
-def in_circ(pt: tuple, circuit: list) -> bool:
-    for point in circuit:
-        if same(pt, point):
-            return True
-    return False
-
-
-def find_closest(a: tuple, distances: list) -> tuple:
-    connected = []
-    for dist in distances:
-        if same(dist[0], a):
-            if not same(a, dist[1]):
-                connected.append(dist)
-
-    closest_pt = min(connected, key=lambda x: x[2])
-    print('closest is ', a, closest_pt)
-    return closest_pt
+def distance_squared(a: tuple, b: tuple) -> int:
+    # Squared distances sort the same as real ones and stay exact integers
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
 
 
 def find_all_pairs(data: list) -> list:
-    # Data struct is tuple of (a, b, distance)
-    log.info(f"computing all-pairs for {len(data)=}")
+    # Data struct is tuple of (distance squared, a index, b index), each unordered pair once
+    log.info("computing all-pairs for %d points", len(data))
     distances = []
     for a_idx, a in enumerate(data):
-        for b_idx, b in enumerate(data):
-            distances.append((a, b, distance(a, b)))
-    log.info(f"Done, {len(distances)=}")
+        for b_idx in range(a_idx + 1, len(data)):
+            distances.append((distance_squared(a, data[b_idx]), a_idx, b_idx))
+    distances.sort()
+    log.info("Done, %d pairs", len(distances))
     return distances
 
 
-def part_one(input_data: list, num_pairs=10) -> int:
-    data = parse(input_data)
-    # print(distance(data[0], data[1]))
-    distances = find_all_pairs(data)
-    first_chunk = [x for x in distances if x[2] > 0]
-    first_chunk.sort(key=lambda x: x[2])
-    trimmed_chunk = first_chunk[:num_pairs * 2]
-    unique_nodes = set([x[0] for x in trimmed_chunk])
-    circuits = [[x] for x in unique_nodes]
-
-    for connection in trimmed_chunk:
-        disjoint = []
-        newcirc = []
-
-        for c in circuits:
-            if in_circ(connection[0],c):
-                newcirc.extend(c)
-            elif in_circ(connection[1],c):
-                newcirc.extend(c)
-            else:
-                disjoint.append(c)
-        circuits = disjoint + [newcirc]
-
-    circuits.sort(key = lambda x:len(x), reverse=True)
-
-    return (len(circuits[0]) * len(circuits[1]) * len(circuits[2]))
-
-
-def part_two(input_data: list) -> int:
-    data = parse(input_data)
-    # print(distance(data[0], data[1]))
-    distances = find_all_pairs(data)
-    first_chunk = [x for x in distances if x[2] > 0]
-    first_chunk.sort(key=lambda x: x[2])
-    trimmed_chunk = first_chunk[::2]
-
-    circuits = [[x] for x in data]
-    counter = 0
-    while len(circuits) > 1 and counter < len(trimmed_chunk):
-        connection = trimmed_chunk[counter]
-        disjoint = []
-        newcirc = []
-
-        for c in circuits:
-            if in_circ(connection[0], c):
-                newcirc.extend(c)
-            elif in_circ(connection[1], c):
-                newcirc.extend(c)
-            else:
-                disjoint.append(c)
-        circuits = disjoint + [newcirc]
-        counter += 1
-
-    last_circ = trimmed_chunk[counter - 1]
-    log.info(f"{last_circ=} {counter=}")
-    return last_circ[0][0] * last_circ[1][0]
+def neighbours(tree: KDTree, data: list, owner: int):
+    # A point's neighbours as (distance squared, index), nearest first. They're read from a k-nearest
+    # batch, and the next batch is twice the size, so finding the j-th neighbour costs O(log j) amortized
+    # instead of a fresh search past the j - 1 closer ones.
+    size = FIRST_BATCH
+    seen = 0
+    while seen < len(data) - 1:
+        batch = tree.knn(data[owner], size, skip=owner)
+        yield from batch[seen:]
+        seen = len(batch)
+        size *= 2
+
+
+def ascending_pairs(data: list):
+    # Lazily yield unique (distance squared, a index, b index) pairs in ascending order.
+    # The heap holds one entry per point - its next unvisited neighbour - and a point only moves on
+    # to its following neighbour when its entry is popped, so memory stays proportional to the
+    # neighbours actually visited. Each pair is reached from both ends; only the copy owned by the
+    # lower index is yielded.
+    tree = KDTree(data)
+    cursors = [neighbours(tree, data, owner) for owner in range(len(data))]
+    heap = []
+    for owner, cursor in enumerate(cursors):
+        nearest = next(cursor, None)
+        if nearest is not None:
+            heap.append((nearest[0], min(owner, nearest[1]), max(owner, nearest[1]), owner))
+    heapq.heapify(heap)
+
+    while heap:
+        dist, a_idx, b_idx, owner = heap[0]
+        if owner == a_idx:
+            if tracer.active:
+                tracer("pair %d-%d at distance squared %d", a_idx, b_idx, dist, every=100)
+            yield dist, a_idx, b_idx
+        following = next(cursors[owner], None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following[0], min(owner, following[1]), max(owner, following[1]), owner))
+
+
+def part_one(data: list, num_pairs=10) -> int:
+    # data is the parsed list of points
+    circuits = DisjointSet(len(data))
+    for counter, (_, a_idx, b_idx) in enumerate(ascending_pairs(data)):
+        if counter >= num_pairs:
+            break
+        circuits.union(a_idx, b_idx)
+
+    sizes = sorted(circuits.component_sizes(), reverse=True)
+    return product(sizes[:3])
+
+
+def part_two(data: list) -> int:
+    circuits = DisjointSet(len(data))
+    for counter, (_, a_idx, b_idx) in enumerate(ascending_pairs(data)):
+        # Stop as soon as the last merge leaves a single circuit
+        if circuits.union(a_idx, b_idx) and circuits.count == 1:
+            log.info("last connection %s %s after %d pairs", data[a_idx], data[b_idx], counter + 1)
+            return data[a_idx][0] * data[b_idx][0]
+    return 0
+
+
+def load_input(sample: bool) -> tuple:
+    # The sample connects its 10 closest pairs for part one, the full input 1000
+    return parsed_input(8, parse, sample=sample), 10 if sample else 1000
+
+
+def solve(data: tuple, part: int) -> int:
+    points, num_pairs = data
+    return part_one(points, num_pairs=num_pairs) if part == 1 else part_two(points)
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes n random junction boxes, and part one connects
+# n pairs the way the full input's 1000 boxes connect 1000. Part two walks every pair shorter than the
+# last connection, and on random boxes there are more of those per box as n grows.
+SCALE_N = 1000
+COMPLEXITY = {1: 1.3, 2: 1.5}
+
+
+def generate(n: int, seed=0) -> list:
+    rng = random.Random(seed)
+    return [f"{rng.randrange(100000)},{rng.randrange(100000)},{rng.randrange(100000)}" for _ in range(n)]
+
+
+def from_lines(lines: list) -> tuple:
+    points = parse(lines)
+    return points, len(points)
+
+
+def test_spatial_index():
+    data = parsed_input(8, parse, sample=True)
+    tree = KDTree(data)
+    for idx, point in enumerate(data):
+        brute = sorted((distance_squared(point, x), x_idx) for x_idx, x in enumerate(data) if x_idx != idx)
+        nearest = tree.knn(point, 5, skip=idx)
+        assert_expr("nearest == brute[:5]")
+        within = tree.radius(point, brute[3][0], skip=idx)
+        expected = [x for x in brute if x[0] <= brute[3][0]]
+        assert_expr("within == expected")
+        # Every neighbour in order, across several batch boundaries
+        walked = list(neighbours(tree, data, idx))
+        assert_expr("walked == brute")
+    # The lazy stream has to reproduce the full sorted pair list exactly
+    streamed = list(ascending_pairs(data))
+    assert_expr("streamed == find_all_pairs(data)")
 
 
 def test_part1():
-    sample, full, answer, _ = get_all_data(8)
+    answer, _ = get_answers(8)
+    sample = parsed_input(8, parse, sample=True)
     score = part_one(sample, num_pairs=10)
-    # assert_expr("str(score) == answer[0]")
+    assert_expr("str(score) == answer[0]")
     log.info(f"part one sample {score=}")
     log.info("Doing full dataset")
     # if we got here, we can proceed to the full data set
-    score = part_one(full, num_pairs=1000)
+    score = part_one(parsed_input(8, parse, sample=False), num_pairs=1000)
     log.info(f'part one full dataset {score=}')
 
 
 def test_part2():
-    sample, full, _, answer = get_all_data(8)
-
-    score = part_two(sample)
+    _, answer = get_answers(8)
+    score = part_two(parsed_input(8, parse, sample=True))
     assert_expr("str(score) == answer[0]")
     log.info("Doing full dataset")
     # if we got here, we can proceed to the full data set
-    score = part_two(full)
+    score = part_two(parsed_input(8, parse, sample=False))
     log.info(f'part two full {score=}')
 
 
 if __name__ == '__main__':
-    # test_part1()
-    test_part2()
\ No newline at end of file
+    test_part1()
+    test_part2()
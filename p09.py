@@ -1,29 +1,179 @@
 #!/usr/bin/env python3
-from utils import get_all_data, log, assert_expr, product
+import random
+
+from utils import get_answers, parsed_input, log, assert_expr, product, timed, tracer
+import numpy as np
 
 
 def area(p1, p2):
     return product([abs(p1[x] - p2[x]) + 1 for x in range(len(p1))])
 
 
-def find_all_areas(data: list) -> list:
-    # Data struct is tuple of (a, b, area)
-    log.info(f"computing all-pairs for {len(data)=}")
-    areas = []
-    for a_idx, a in enumerate(data):
-        for b_idx, b in enumerate(data):
-            areas.append((a, b, area(a, b)))
-    return areas
+def staircase(data: list, x_sign: int, y_sign: int) -> list:
+    # The points not dominated in the (x_sign, y_sign) direction, e.g. (1, 1) keeps every point with
+    # no other point both left of and below it. This is the rectilinear version of the convex hull:
+    # a rectangle's corner can always be slid out to a staircase point without shrinking the area.
+    rc = []
+    best_y = None
+    for x, y in sorted(data, key=lambda p: (x_sign * p[0], y_sign * p[1])):
+        if best_y is None or y_sign * y < best_y:
+            rc.append((x, y))
+            best_y = y_sign * y
+    return rc
+
+
+def max_area(corners_a: list, corners_b: list) -> int:
+    # Largest rectangle between any corner in corners_a and any corner in corners_b, in one vectorized pass
+    a = np.array(corners_a, dtype=np.int64)
+    b = np.array(corners_b, dtype=np.int64)
+    widths = np.abs(a[:, None, 0] - b[None, :, 0]) + 1
+    heights = np.abs(a[:, None, 1] - b[None, :, 1]) + 1
+    return int((widths * heights).max())
 
 
 def part_one(input_data: list) -> int:
-    areas = find_all_areas(input_data)
-    score = max(areas, key=lambda x: x[2])
-    return score[2]
-
+    # Opposite corners are either lower-left/upper-right or upper-left/lower-right, and in each case
+    # both can be taken from the matching staircase, which cuts N^2 pairs down to a handful.
+    lower_left = staircase(input_data, 1, 1)
+    upper_right = staircase(input_data, -1, -1)
+    upper_left = staircase(input_data, 1, -1)
+    lower_right = staircase(input_data, -1, 1)
+    log.debug("%d points, staircases %d %d %d %d", len(input_data), len(lower_left), len(upper_right),
+              len(upper_left), len(lower_right))
+    return max(max_area(lower_left, upper_right), max_area(upper_left, lower_right))
+
+
+def load_input(sample: bool) -> list:
+    return parsed_input(9, parse, sample=sample)
+
+
+def solve(data: list, part: int) -> int:
+    return part_one(data) if part == 1 else part_two(data)
+
+
+# Scaling hooks, see test_scaling.py: generate(n) makes a loop of about n red tiles
+SCALE_N = 200
+COMPLEXITY = {1: 1.3, 2: 2.0}
+
+
+def generate(n: int, seed=0, span=100000) -> list:
+    # An x-monotone rectilinear loop: a random skyline along the top from left to right, then another
+    # one along the bottom back again, always below the top. Neighbouring heights differ so no red
+    # tile sits in the middle of a straight edge. Coordinates stay below span.
+    rng = random.Random(seed)
+    num_cols = max(n // 4, 2)
+    xs = sorted(rng.sample(range(1, span), num_cols + 1))
+    tops, bottoms = [], []
+    for _ in range(num_cols):
+        top = rng.randrange(span // 2, span)
+        while tops and top == tops[-1]:
+            top = rng.randrange(span // 2, span)
+        bottom = rng.randrange(0, span // 2)
+        while bottoms and bottom == bottoms[-1]:
+            bottom = rng.randrange(0, span // 2)
+        tops.append(top)
+        bottoms.append(bottom)
+
+    loop = [(xs[0], tops[0])]
+    for col in range(1, num_cols):
+        loop += [(xs[col], tops[col - 1]), (xs[col], tops[col])]
+    loop += [(xs[-1], tops[-1]), (xs[-1], bottoms[-1])]
+    for col in range(num_cols - 1, 0, -1):
+        loop += [(xs[col], bottoms[col]), (xs[col], bottoms[col - 1])]
+    loop.append((xs[0], bottoms[0]))
+    return [f"{x},{y}" for x, y in loop]
+
+
+def from_lines(lines: list) -> list:
+    return parse(lines)
+
+
+def test_staircase():
+    # Brute force over every pair, including a case where the winning corner is not a convex hull vertex
+    full = parsed_input(9, parse, sample=False)
+    for data in [[(0, 0), (10, 4), (4, 10), (7, 6)], full[:150]]:
+        brute = max(area(a, b) for a in data for b in data)
+        score = part_one(data)
+        assert_expr("score == brute")
+
+
+def compress(values: list) -> dict:
+    # Map each distinct coordinate to an index, leaving one more index for the gap after it when there
+    # are tiles between it and the next coordinate. Neighbours only 1 apart have no gap to stand for.
+    rc = {}
+    idx = 0
+    ordered = sorted(set(values))
+    for value, following in zip(ordered, ordered[1:] + [None]):
+        rc[value] = idx
+        idx += 2 if following is not None and following - value > 1 else 1
+    return rc
 
 
-def part_two(input_data: list) -> int:
+@timed
+def inside_table(loop: list) -> tuple:
+    # Rasterize the rectilinear loop onto the compressed grid and return (x map, y map, prefix sums)
+    # where prefix[r, c] counts the inside-or-boundary cells above and left of (r, c).
+    x_map = compress([p[0] for p in loop])
+    y_map = compress([p[1] for p in loop])
+    num_rows = max(y_map.values()) + 1
+    num_cols = max(x_map.values()) + 1
+    edges = list(zip(loop, loop[1:] + loop[:1]))
+
+    # Scanline fill. A ray just below each coordinate row crosses the vertical edges with
+    # y_lo <= y < y_hi, and the cells between alternate crossings (edges included) are inside. A gap
+    # row, if there is one, sees the same edges as the coordinate row above it.
+    verticals = []
+    for a, b in edges:
+        if a[0] == b[0]:
+            lo, hi = sorted((y_map[a[1]], y_map[b[1]]))
+            verticals.append((lo, hi, x_map[a[0]]))
+    coverage = np.zeros((num_rows, num_cols + 1), dtype=np.int32)
+    rows = sorted(set(y_map.values()))
+    for row, next_row in zip(rows, rows[1:] + [num_rows]):
+        crossings = sorted(x for lo, hi, x in verticals if lo <= row < hi)
+        for start, end in zip(crossings[::2], crossings[1::2]):
+            coverage[row:next_row, start] += 1
+            coverage[row:next_row, end + 1] -= 1
+    inside = np.cumsum(coverage, axis=1)[:, :-1] > 0
+
+    # The horizontal edges along the bottom of the shape aren't under any ray, so draw the loop itself
+    for a, b in edges:
+        r_lo, r_hi = sorted((y_map[a[1]], y_map[b[1]]))
+        c_lo, c_hi = sorted((x_map[a[0]], x_map[b[0]]))
+        inside[r_lo:r_hi + 1, c_lo:c_hi + 1] = True
+
+    prefix = np.zeros((num_rows + 1, num_cols + 1), dtype=np.int64)
+    prefix[1:, 1:] = inside.cumsum(axis=0).cumsum(axis=1)
+    return x_map, y_map, prefix
+
+
+def part_two(input_data: list, chunk_size=4096) -> int:
+    # Largest red-cornered rectangle that lies entirely on red or green tiles. Every candidate is an O(1)
+    # prefix-sum lookup on the compressed grid, tried biggest first in vectorized chunks.
+    x_map, y_map, prefix = inside_table(input_data)
+    points = np.array(input_data, dtype=np.int64)
+    cols = np.array([x_map[p[0]] for p in input_data])
+    rows = np.array([y_map[p[1]] for p in input_data])
+
+    a_idx, b_idx = np.triu_indices(len(input_data), k=1)
+    areas = (np.abs(points[a_idx, 0] - points[b_idx, 0]) + 1) * (np.abs(points[a_idx, 1] - points[b_idx, 1]) + 1)
+    order = np.argsort(areas, kind='stable')[::-1]
+
+    for start in range(0, len(order), chunk_size):
+        chunk = order[start:start + chunk_size]
+        a = a_idx[chunk]
+        b = b_idx[chunk]
+        r_lo = np.minimum(rows[a], rows[b])
+        r_hi = np.maximum(rows[a], rows[b]) + 1
+        c_lo = np.minimum(cols[a], cols[b])
+        c_hi = np.maximum(cols[a], cols[b]) + 1
+        filled = prefix[r_hi, c_hi] - prefix[r_lo, c_hi] - prefix[r_hi, c_lo] + prefix[r_lo, c_lo]
+        valid = np.flatnonzero(filled == (r_hi - r_lo) * (c_hi - c_lo))
+        if tracer.active:
+            tracer("candidates %d-%d: %d valid", start, start + len(chunk), len(valid))
+        if len(valid):
+            log.debug("found after %d candidates", start + valid[0] + 1)
+            return int(areas[chunk[valid[0]]])
     return 0
 
 
@@ -38,9 +188,9 @@ def parse(inp_data: list) -> list:
 
 
 def test_part1():
-    r_sample, r_full, answer, _ = get_all_data(9)
-    sample = parse(r_sample)
-    full = parse(r_full)
+    answer, _ = get_answers(9)
+    sample = parsed_input(9, parse, sample=True)
+    full = parsed_input(9, parse, sample=False)
     score = part_one(sample)
     log.info(f'sample {score=}')
     assert_expr("str(score) == answer[0]")
@@ -50,16 +200,54 @@ def test_part1():
     log.info(f'full {score=}')
 
 
-def test_part2():
-    sample, full, _, answer = get_all_data(3)
+def brute_force_part_two(loop: list) -> int:
+    # Tile by tile: mark the loop's edges, then every tile whose rightward ray crosses an odd number of
+    # vertical edges, and try every pair of red corners against that set
+    tiles = set()
+    verticals = []
+    for a, b in zip(loop, loop[1:] + loop[:1]):
+        for x in range(min(a[0], b[0]), max(a[0], b[0]) + 1):
+            for y in range(min(a[1], b[1]), max(a[1], b[1]) + 1):
+                tiles.add((x, y))
+        if a[0] == b[0]:
+            verticals.append((a[0], min(a[1], b[1]), max(a[1], b[1])))
+    xs = [p[0] for p in loop]
+    ys = [p[1] for p in loop]
+    for x in range(min(xs), max(xs) + 1):
+        for y in range(min(ys), max(ys) + 1):
+            if sum(1 for v_x, lo, hi in verticals if v_x > x and lo <= y < hi) % 2:
+                tiles.add((x, y))
+
+    best = 0
+    for a in loop:
+        for b in loop:
+            if all((x, y) in tiles for x in range(min(a[0], b[0]), max(a[0], b[0]) + 1)
+                   for y in range(min(a[1], b[1]), max(a[1], b[1]) + 1)):
+                best = max(best, area(a, b))
+    return best
+
 
+def test_part2():
+    # Small loops against a tile-level brute force, including neighbouring coordinates only 1 apart
+    loops = [[(1, 5), (2, 5), (2, 4), (4, 4), (4, 6), (5, 6), (5, 8), (1, 8), (1, 7), (2, 7), (2, 6), (1, 6)]]
+    loops += [parse(generate(12, seed=seed, span=16)) for seed in range(20)]
+    for loop in loops:
+        brute = brute_force_part_two(loop)
+        score = part_two(loop)
+        assert_expr("score == brute")
+
+    _, answer = get_answers(9)
+    sample = parsed_input(9, parse, sample=True)
+    full = parsed_input(9, parse, sample=False)
     score = part_two(sample)
+    log.info(f'sample {score=}')
     assert_expr("str(score) == answer[0]")
     log.info("Doing full dataset")
     # if we got here, we can proceed to the full data set
-    log.info(f'{score=}')
+    score = part_two(full)
+    log.info(f'full {score=}')
 
 
 if __name__ == '__main__':
     test_part1()
-    # test_part2()
\ No newline at end of file
+    test_part2()
\ No newline at end of file
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Run every (day, part, dataset) job in parallel.
+#
+#   ./run_all.py                    every day, both parts, sample and full
+#   ./run_all.py --days 8 9 --full  just the full inputs of days 8 and 9
+#   ./run_all.py --timeout 30       give up on any job that runs longer than 30 seconds
+#   ./run_all.py --no-cache         solve everything, even answers in the result cache
+#
+# Jobs go onto a process pool sized to the machine, longest first according to the last run's timings
+# (or bench.py's history), and results print as they finish. Answers come from the result cache when
+# neither the input nor the solver changed. Sample results are checked against the answer files.
+# Exits non-zero if any job failed, timed out or got a wrong sample answer.
+import argparse
+import importlib
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bench import discover, load_json, save_json, HERE, HISTORY_FILE
+
+TIMINGS_FILE = os.path.join(HERE, 'run_timings.json')
+
+
+def job_key(name: str, part: int, sample: bool) -> str:
+    return f"{name}.{part}.{'sample' if sample else 'full'}"
+
+
+def _alarm(signum, frame):
+    raise TimeoutError()
+
+
+def run_job(name: str, day: int, part: int, sample: bool, timeout: float, use_cache=True) -> tuple:
+    # Runs in a worker process. Returns (key, answer, seconds, cached, error).
+    os.chdir(HERE)
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import utils
+    utils.log.setLevel('WARNING')
+    key = job_key(name, part, sample)
+    start = time.perf_counter()
+    if timeout:
+        signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        answer, cached = utils.results.solve(importlib.import_module(name), day, part, sample=sample, use_cache=use_cache)
+        return key, str(answer), time.perf_counter() - start, cached, None
+    except TimeoutError:
+        return key, None, time.perf_counter() - start, False, f"timed out after {timeout}s"
+    except Exception as exc:
+        return key, None, time.perf_counter() - start, False, f"{type(exc).__name__}: {exc}"
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def previous_timings() -> dict:
+    # Seconds per job key from the last run, falling back to the benchmark history for full inputs
+    rc = {}
+    history = load_json(HISTORY_FILE, [])
+    if history:
+        for bench_key, result in history[-1]['results'].items():
+            name, part = bench_key.rsplit('.', 1)
+            rc[job_key(name, int(part), False)] = result['parse'] + result['solve']
+    rc.update(load_json(TIMINGS_FILE, {}))
+    return rc
+
+
+def expected_answer(day: int, part: int):
+    sys.path.insert(0, HERE)
+    from utils import get_answers
+    try:
+        answers = get_answers(day)
+    except FileNotFoundError:
+        return None
+    answer = answers[part - 1]
+    return answer[0] if answer else None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run every day in parallel")
+    parser.add_argument('--days', type=int, nargs='*', help="only these day numbers")
+    parser.add_argument('--parts', type=int, nargs='*', default=[1, 2])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--sample', action='store_true', help="only the sample inputs")
+    group.add_argument('--full', action='store_true', help="only the full inputs")
+    parser.add_argument('--timeout', type=float, default=60.0, help="seconds per job, 0 for none")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--no-cache', action='store_true', help="solve even if the answer is cached")
+    args = parser.parse_args(argv)
+
+    os.chdir(HERE)
+    days = discover()
+    datasets = [True] if args.sample else [False] if args.full else [True, False]
+    jobs = [(name, part, sample) for name, day in days.items() if not args.days or day in args.days
+            for part in args.parts for sample in datasets]
+
+    # Longest first, so the slowest job isn't the last one to start. Unknown jobs go first too.
+    timings = previous_timings()
+    jobs.sort(key=lambda x: -timings.get(job_key(*x), float('inf')))
+
+    failures = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_job, name, days[name], part, sample, args.timeout, not args.no_cache):
+                   (name, part, sample) for name, part, sample in jobs}
+        for future in as_completed(futures):
+            name, part, sample = futures[future]
+            key, answer, seconds, cached, error = future.result()
+            status = 'ok (cached)' if cached else 'ok'
+            if error:
+                status = f"FAILED {error}"
+                failures += 1
+            elif sample:
+                expected = expected_answer(days[name], part)
+                if expected is not None and expected != answer:
+                    status = f"WRONG, expected {expected}"
+                    failures += 1
+            # A cache hit says nothing about how long the job takes to solve
+            if not error and not cached:
+                timings[key] = seconds
+            print(f"{key:22} {seconds * 1000:10.1f} ms  {answer}  {status}", flush=True)
+
+    save_json(TIMINGS_FILE, {key: timings[key] for key in sorted(timings) if key.count('.') == 2})
+    print(f"{len(jobs)} jobs in {time.perf_counter() - start:.2f}s wall, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
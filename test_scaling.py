@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Empirical complexity checks on synthetic inputs.
+#
+# A day opts in by defining, next to load_input and solve:
+#   generate(n, seed=0)  lines of a random valid input of size n, same format as data/NN.txt
+#   from_lines(lines)    what load_input would return for those lines (optional, defaults to the lines)
+#   SCALE_N              the smallest n to time
+#   COMPLEXITY           {part: exponent}, the declared bound on solve time ~ n ** exponent
+#
+# Each part is timed at SCALE_N, 2x, 4x and 8x that, and the exponent is the least squares slope of
+# log(time) against log(n). Slower than the bound plus TOLERANCE fails the test.
+#
+#   python -m pytest -q test_scaling.py
+from functools import lru_cache
+import importlib
+import math
+import time
+
+import pytest
+
+from aoc import registry
+
+STEPS = 4
+REPEATS = 3
+MIN_BATCH = 0.02  # Seconds; quicker solves are run in batches so timer resolution doesn't matter
+TOLERANCE = 0.35  # Timer noise and log factors at these sizes
+
+
+def scaling_modules() -> list:
+    rc = []
+    for name in registry():
+        module = importlib.import_module(name)
+        if hasattr(module, 'generate'):
+            rc.append(module)
+    return rc
+
+
+@lru_cache(maxsize=4)
+def load_generated(module, n: int, seed=0):
+    # Both parts of a day are timed on the same input
+    lines = module.generate(n, seed=seed)
+    return module.from_lines(lines) if hasattr(module, 'from_lines') else lines
+
+
+def run_batch(module, data, part: int, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        module.solve(data, part)
+    return time.perf_counter() - start
+
+
+def best_time(module, data, part: int) -> float:
+    # Seconds per solve, the best of REPEATS batches. A single slow run is accurate enough on its own.
+    number = 1
+    elapsed = run_batch(module, data, part, number)
+    if elapsed >= 5 * MIN_BATCH:
+        return elapsed
+    while elapsed < MIN_BATCH:
+        number *= 2
+        elapsed = run_batch(module, data, part, number)
+    return min([elapsed] + [run_batch(module, data, part, number) for _ in range(REPEATS - 1)]) / number
+
+
+def fit_exponent(sizes: list, times: list) -> float:
+    # Slope of the least squares line through (log n, log t)
+    xs = [math.log(x) for x in sizes]
+    ys = [math.log(x) for x in times]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+
+def test_fit_exponent():
+    sizes = [100, 200, 400, 800]
+    assert abs(fit_exponent(sizes, [x * 3.0 for x in sizes]) - 1.0) < 1e-9
+    assert abs(fit_exponent(sizes, [x ** 2 for x in sizes]) - 2.0) < 1e-9
+
+
+@pytest.mark.parametrize('module', scaling_modules(), ids=lambda x: x.__name__)
+def test_generate(module):
+    # Seeded, so the same seed always gives the same input, and a small one has to solve cleanly
+    assert module.generate(50, seed=1) == module.generate(50, seed=1)
+    data = load_generated(module, 50, seed=1)
+    for part in module.COMPLEXITY:
+        module.solve(data, part)
+
+
+@pytest.mark.parametrize('module,part', [(x, part) for x in scaling_modules() for part in x.COMPLEXITY],
+                         ids=lambda x: getattr(x, '__name__', str(x)))
+def test_scaling(module, part):
+    sizes = [module.SCALE_N * 2 ** step for step in range(STEPS)]
+    times = [best_time(module, load_generated(module, n), part) for n in sizes]
+    exponent = fit_exponent(sizes, times)
+    bound = module.COMPLEXITY[part]
+    timings = ', '.join(f"n={n} {t * 1000:.1f} ms" for n, t in zip(sizes, times))
+    assert exponent <= bound + TOLERANCE, f"{module.__name__} part {part} grows as n ** {exponent:.2f}, " \
+                                          f"declared {bound}: {timings}"
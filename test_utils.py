@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# Tests for the shared code in utils.py. The day files keep the tests for their own solvers.
+#
+#   python -m pytest -q test_utils.py
+from collections import OrderedDict
+import logging
+import os
+import random
+
+from utils import Data2D, get_data_lines, assert_expr, load_2d_arrays, dimensions, get_column, NEIGHBORS_8, GridGraph, \
+    CSRGraph, dijkstra, IntervalSet, parsed_input, parser_identity, source_digest, ResultCache, reduce_blocks, \
+    profiler, run_solver, log, tracer, TRACE, _read_cache_file, _write_cache_file, _cache_slot
+import utils
+import p03
+import p04
+import p05
+
+
+def test_data2d():
+    # The byte-backed grid has to behave like the list of lists it replaced
+    sample, _ = load_2d_arrays(4)
+    grid = p04.load(True)
+    assert_expr("grid.dimensions() == dimensions(sample)")
+    assert_expr("grid.grid.nbytes == grid.num_rows() * grid.num_cols()")
+    rows = [list(grid[x]) for x in range(grid.num_rows())]
+    column = [row[3] for row in sample]
+    assert_expr("rows == sample")
+    assert_expr("list(grid.column(3)) == column")
+
+    # Iterates and indexes like the list of lists: rows in order, negative indices from the end, and
+    # IndexError past the edge rather than wrapping around
+    iterated = [list(row) for row in grid]
+    assert_expr("iterated == sample and list(get_column(grid, 3)) == column")
+    assert_expr("list(grid[-1]) == sample[-1] and grid[-1, -1] == sample[-1][-1]")
+    raised = []
+    for bad in (lambda: grid[10], lambda: grid.column(10), lambda: grid[0, 10], lambda: grid[-11]):
+        try:
+            bad()
+        except IndexError:
+            raised.append(True)
+    assert_expr("len(raised) == 4")
+
+    # Stencils against a hand count of the eight neighbours
+    counts = grid.neighbor_count('@')
+    brute = [[sum(grid[r + dr, c + dc] == '@' for dr, dc in NEIGHBORS_8
+                  if 0 <= r + dr < grid.num_rows() and 0 <= c + dc < grid.num_cols())
+              for c in range(grid.num_cols())] for r in range(grid.num_rows())]
+    assert_expr("counts.tolist() == brute")
+    assert_expr("(grid.shifted(0, 1, '.')[:, :-1] == grid.grid[:, 1:]).all()")
+
+    grid.add_padding('.')
+    assert_expr("grid.dimensions() == (12, 12) and grid[0][0] == '.' and grid[1][3] == sample[0][2]")
+    # The padded copy is made once and kept read-only; writes inside the border show up in every view
+    padded = grid.as_array()
+    grid[2][2] = '#'
+    assert_expr("grid.grid.shape == (10, 10) and grid[2, 2] == '#' and str(grid[2])[2] == '#'")
+    assert_expr("grid.as_array()[2, 2] == ord('#') and grid.as_array() is grid.as_array()")
+    assert_expr("not padded.flags.writeable and grid.column(2)[2] == '#'")
+    grid[0][0] = '#'
+    grid[1][3] = 'x'
+    assert_expr("grid.grid.shape == (12, 12) and grid[0][0] == '#' and grid[1][3] == 'x'")
+    grid.update(grid.mask('x'), '.')
+    assert_expr("grid[1][3] == '.' and not grid.mask('x').any()")
+
+
+def relaxed_distances(graph: GridGraph, start: int) -> list:
+    # Reference shortest paths: relax every edge until nothing improves
+    dist = [float('inf')] * graph.num_cells
+    dist[start] = 0
+    changed = True
+    while changed:
+        changed = False
+        for idx in range(graph.num_cells):
+            for n_idx, step in graph.neighbors(idx):
+                if dist[idx] + step < dist[n_idx]:
+                    dist[n_idx] = dist[idx] + step
+                    changed = True
+    return dist
+
+
+def test_grid_graph():
+    # bfs, dijkstra and astar against the reference on random grids of step costs with walls, in both
+    # neighbourhoods
+    rng = random.Random(4)
+    for diagonals in (False, True):
+        for _ in range(20):
+            grid = [[rng.choice('123456789###') for _ in range(7)] for _ in range(6)]
+            weighted = GridGraph(grid, cost=lambda _, dest: None if dest == '#' else int(dest), diagonals=diagonals)
+            unit = GridGraph(grid, cost=lambda _, dest: None if dest == '#' else 1, diagonals=diagonals)
+            start = rng.randrange(weighted.num_cells)
+            expected = relaxed_distances(weighted, start)
+            expected_steps = relaxed_distances(unit, start)
+            costs = weighted.dijkstra(start)
+            steps = unit.bfs(start)
+            assert_expr("costs == expected and steps == expected_steps")
+            found = [weighted.astar(start, goal) for goal in range(weighted.num_cells)]
+            found_steps = [unit.astar(start, goal) for goal in range(unit.num_cells)]
+            assert_expr("found == expected and found_steps == expected_steps")
+            goal = rng.randrange(weighted.num_cells)
+            early = weighted.dijkstra(start, target=goal)[goal]
+            assert_expr("early == expected[goal]")
+
+
+def test_grid_graph_values():
+    # Whatever the grid is stored as, cost() sees 1-char strings, so '@' walls block on every path
+    data = Data2D()
+    data.load(4, sample=True)
+    lines = get_data_lines(4)[0]
+    blocked = lambda _, dest: None if dest == '@' else 1
+    from_data = GridGraph(data, cost=blocked).bfs((0, 0))
+    from_lines = GridGraph(lines, cost=blocked).bfs((0, 0))
+    from_lists = GridGraph([list(x) for x in lines], cost=blocked).bfs((0, 0))
+    assert_expr("from_data == from_lines == from_lists and from_data[2] == float('inf')")
+
+    # Stopping at a target leaves only settled cells finite, the same as CSRGraph.distances
+    graph = GridGraph(['1191', '1111'], cost=lambda _, dest: int(dest))
+    early = graph.dijkstra(0, target=1)
+    assert_expr("early[:2] == [0, 1] and early[3] == float('inf')")
+    full = graph.dijkstra(0)
+    assert_expr("full == [0, 1, 10, 5, 1, 2, 3, 4]")
+
+
+def test_csr_graph():
+    # Early exit only reports settled nodes - X is 10 straight from S but 3 by way of Y
+    graph = {'S': [('T', 1), ('X', 10), ('Y', 2)], 'Y': [('X', 1)]}
+    compiled = CSRGraph(graph)
+    early = compiled.distances('S', targets='T')
+    assert_expr("early == {'S': 0, 'T': 1} and early['X'] == float('inf')")
+    full = dijkstra(graph, 'S')
+    assert_expr("full == {'S': 0, 'T': 1, 'Y': 2, 'X': 3}")
+    assert_expr("compiled.shortest_path('S', 'X') == (3, ['S', 'Y', 'X'])")
+    assert_expr("compiled.shortest_path('X', 'S') == (float('inf'), [])")
+    both = compiled.distances(['T', 'Y'])
+    assert_expr("both == {'T': 0, 'Y': 0, 'X': 1}")
+
+    # The grid's edges as a labelled graph have to give the same answers as the grid engine,
+    # from several sources at once and when stopping at a target
+    rng = random.Random(17)
+    for _ in range(20):
+        grid = [[rng.choice('123456789#') for _ in range(6)] for _ in range(5)]
+        cells = GridGraph(grid, cost=lambda _, dest: None if dest == '#' else int(dest), diagonals=True)
+        labelled = CSRGraph({cells.position(idx): [(cells.position(n_idx), step) for n_idx, step in cells.neighbors(idx)]
+                             for idx in range(cells.num_cells)})
+        sources = rng.sample(range(cells.num_cells), 2)
+        by_cell = cells.dijkstra(sources)
+        expected = {cells.position(idx): value for idx, value in enumerate(by_cell) if value != float('inf')}
+        found = labelled.distances([cells.position(x) for x in sources])
+        assert_expr("found == expected")
+        goal = rng.randrange(cells.num_cells)
+        early = labelled.distances([cells.position(x) for x in sources], targets=cells.position(goal))
+        assert_expr("early[cells.position(goal)] == by_cell[goal]")
+        wrong = [label for label, value in early.items() if value != expected[label]]
+        assert_expr("not wrong")
+        cost, path = labelled.shortest_path(cells.position(sources[0]), cells.position(goal))
+        steps = sum(int(grid[row][col]) for row, col in path[1:])
+        assert_expr("cost == cells.dijkstra(sources[0])[goal] and (not path or steps == cost)")
+
+
+def test_profiling():
+    profiler.enabled = True
+    profiler.reset()
+    try:
+        score = run_solver(p04, 2, sample=True)
+    finally:
+        profiler.enabled = False
+    stats = profiler.stats
+    assert_expr("score == 43 and stats['p04.peel'][0] == 1")
+    assert_expr("'p04.parse' in stats and 'p04.solve.2' in stats")
+
+
+def test_tracer_levels():
+    # Emitting traces only opens up the trace logger; the solvers' log and the root logger keep their levels
+    root_level = logging.getLogger().level
+    tracer.configure(emit=True)
+    try:
+        levels = (tracer.logger.level, log.level, logging.getLogger().level)
+    finally:
+        tracer.configure()
+    assert_expr("levels == (TRACE, logging.INFO, root_level) and tracer.logger.name == 'aoc.trace'")
+    assert_expr("tracer.logger.level == logging.NOTSET")
+
+
+def test_interval_set():
+    fresh = IntervalSet([(10, 14), (3, 5), (16, 20), (12, 18), (6, 6)])
+    assert_expr("list(fresh) == [(3, 6), (10, 20)]")
+    assert_expr("fresh.total_length() == 15")
+    hits = [x in fresh for x in range(0, 23)]
+    batch = fresh.contains_many(range(0, 23)).tolist()
+    assert_expr("hits == batch")
+    assert_expr("batch.count(True) == 15")
+    assert_expr("not IntervalSet().contains_many([1, 2]).any()")
+
+
+def test_parsed_input():
+    # Cached parses come back identical to a fresh parse, and repeat calls hand back the same object
+    sample, _ = get_data_lines(5)
+    first = parsed_input(5, p05.parse_data, sample=True)
+    again = parsed_input(5, p05.parse_data, sample=True)
+    fresh = tuple(tuple(x) for x in p05.parse_data(sample))
+    assert_expr("first == fresh and again is first")
+    # Shared, so read-only: lists come back as tuples and arrays can't be written
+    banks = parsed_input(3, p03.load_banks, sample=True)
+    assert_expr("not banks.flags.writeable and isinstance(parsed_input(5, sample=True), tuple)")
+    # Keyed on the module's source, not bytecode constants whose addresses change every process
+    identity = parser_identity(p05.parse_data)
+    assert_expr("identity == f'p05.parse_data:{source_digest(p05)}'")
+
+
+def test_parse_cache_file(tmp_path):
+    # A truncated cache file, as a killed writer would leave, reads as a miss and is removed
+    cache_file = str(tmp_path / 'key')
+    _write_cache_file(cache_file, p05.parse_data(get_data_lines(5)[0]))
+    found, value = _read_cache_file(cache_file)
+    assert_expr("found and value == p05.parse_data(get_data_lines(5)[0])")
+    with open(cache_file + '.pkl', 'r+b') as fh:
+        fh.truncate(10)
+    found, value = _read_cache_file(cache_file)
+    assert_expr("not found and not os.path.exists(cache_file + '.pkl')")
+
+
+def test_parse_cache_pruning(tmp_path, monkeypatch):
+    # A new entry for an input and parser replaces that pair's old file, and leaves other pairs' alone
+    monkeypatch.setattr(utils, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(utils, '_parse_cache', OrderedDict())
+    slot = _cache_slot(5, 's', parser_identity(p05.parse_data))
+    stale = tmp_path / f"{slot}-{'0' * 64}.pkl"
+    other = tmp_path / f"{'f' * 16}-{'0' * 64}.pkl"
+    stale.write_bytes(b'')
+    other.write_bytes(b'')
+    parsed_input(5, p05.parse_data, sample=True)
+    files = sorted(x.name for x in tmp_path.iterdir())
+    assert_expr("len(files) == 2 and other.name in files and stale.name not in files")
+    current = [x for x in files if x.startswith(slot)]
+    assert_expr("len(current) == 1 and current[0].endswith('.pkl')")
+
+
+def test_result_cache(tmp_path):
+    # Second solve is a hit; a different source digest (an edited solver) is a miss
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    module = p05
+    first = cache.solve(module, 5, 2, sample=True)
+    again = cache.solve(module, 5, 2, sample=True)
+    assert_expr("first == ('14', False) and again == ('14', True)")
+    assert_expr("cache.get(module, 5, 1, sample=True) is None")
+    cache._connect().execute("UPDATE results SET source_digest = 'edited'")
+    assert_expr("cache.get(module, 5, 2, sample=True) is None")
+
+
+def test_reduce_blocks():
+    big = 2 ** 40
+    results = reduce_blocks([big, big, 3, 5, 6, 7, 2 ** 62, 2 ** 62], [0, 3, 5, 5, 6], '*+*++')
+    assert_expr("results == [3 * big * big, 11, 1, 7, 2 ** 63]")
@@ -1,21 +1,130 @@
-from collections import defaultdict
+from __future__ import annotations
+
+from collections import defaultdict, OrderedDict, deque
+from bisect import bisect_right
+import hashlib
 import heapq
-from copy import deepcopy
-from itertools import permutations, combinations_with_replacement
-from functools import reduce
+from functools import reduce, lru_cache, wraps
+from contextlib import contextmanager
+import importlib
 import operator
-import inspect
+import json
 import os
+import sys
+import time
+import pickle
 import logging
 
 
-logging.basicConfig(level=logging.INFO, format='%(pathname)s(%(lineno)s): %(levelname)s %(message)s')
-log = logging.getLogger()
+class LazyModule():
+    # Stand-in for a heavy module that's only imported the first time one of its attributes is used,
+    # so solvers that never touch it don't pay for it at startup. On that first use it swaps itself out
+    # of the namespace it was bound in for the real module, so later lookups cost nothing extra.
+    #     np = LazyModule('numpy', globals(), 'np')
+    def __init__(self, name: str, namespace: dict, alias: str):
+        self._name = name
+        self._namespace = namespace
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        self._namespace[self._alias] = module
+        return getattr(module, attr)
+
+
+np = LazyModule('numpy', globals(), 'np')
+
+
+# The solvers log through 'aoc' with a handler of its own, so importing utils leaves the root logger, and
+# whatever logging the importer has set up, alone
+log = logging.getLogger('aoc')
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(pathname)s(%(lineno)s): %(levelname)s %(message)s'))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+# Trace logging for hot loops. Arguments are only formatted if the event is actually emitted, each call
+# site can be sampled (every Nth event) and rate limited, and events can go to an in-memory ring buffer
+# that is only printed if something fails. Call it as
+#     if tracer.active:
+#         tracer("pos %d after %s", pos, move, every=100)
+# so a disabled tracer costs one attribute check. AOC_TRACE=1 logs trace events, AOC_TRACE_RING=<n> keeps
+# the last n in the ring buffer instead. Events go to 'aoc.trace', so turning them on doesn't lower the
+# level of log or any other logger.
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+
+class Tracer():
+    def __init__(self, logger):
+        self.logger = logger
+        self.ring = None
+        self._counts = defaultdict(int)
+        self._windows = {}  # call site -> [window start, events in window]
+        self.active = False
+        self.configure(emit=os.environ.get('AOC_TRACE', '0') != '0',
+                       ring_size=int(os.environ.get('AOC_TRACE_RING', '0')))
+
+    def configure(self, emit=False, ring_size=0):
+        # emit - send events to the logger at TRACE level. ring_size - keep the last ring_size events in memory.
+        self.logger.setLevel(TRACE if emit else logging.NOTSET)
+        self.emit = emit
+        self.ring = deque(maxlen=ring_size) if ring_size else None
+        self._counts.clear()
+        self._windows.clear()
+        self.active = emit or self.ring is not None
+
+    def __call__(self, message: str, *args, every=1, per_second=None):
+        if not self.active:
+            return
+        caller = sys._getframe(1)
+        site = (caller.f_code, caller.f_lineno)
+        self._counts[site] += 1
+        if self._counts[site] % every:
+            return
+        if per_second is not None:
+            now = time.monotonic()
+            window = self._windows.setdefault(site, [now, 0])
+            if now - window[0] >= 1.0:
+                window[0] = now
+                window[1] = 0
+            if window[1] >= per_second:
+                return
+            window[1] += 1
+        if self.ring is not None:
+            # Store the raw pieces; formatting waits until dump()
+            self.ring.append((_short_filename(caller.f_code.co_filename), caller.f_lineno, message, args))
+        if self.emit:
+            self.logger.log(TRACE, message, *args, stacklevel=2)
+
+    def dump(self) -> list:
+        # Format and return everything in the ring buffer, oldest first, and empty it
+        if not self.ring:
+            return []
+        rc = [f"{filename}({lineno}): TRACE {message % args}" for filename, lineno, message, args in self.ring]
+        self.ring.clear()
+        return rc
+
+    @contextmanager
+    def dump_on_failure(self):
+        # Print the ring buffer if the block raises, so traces cost nothing on a good run
+        try:
+            yield self
+        except BaseException:
+            for line in self.dump():
+                self.logger.error(line)
+            raise
+
+
+tracer = Tracer(log.getChild('trace'))
 
 
 def assert_expr(expr: str):
     # Pass in an expression as a string and this'll print values of variables. It's a loaded gun.
-    frame = inspect.currentframe().f_back
+    frame = sys._getframe(1)
     env = frame.f_locals
     if not eval(expr, frame.f_globals, env):
         # extract variables used in the expression
@@ -27,15 +136,19 @@ def assert_expr(expr: str):
         raise AssertionError(f"{expr} FAILED: {details}")
 
 
+@lru_cache(maxsize=None)
+def _short_filename(filename: str) -> str:
+    return os.path.split(filename)[1]
+
+
 def blog(message, multiline=None, frameNudge=0):
     """B's logging utility.
     
     Document this later, but frameNudge greater than 0 will report the log as coming
     from higher on the stack, useful when there is wrapping."""
-    frameNudge = 0
-    caller = inspect.getframeinfo(inspect.stack(context=1 + frameNudge)[1 + frameNudge][0])
-    _, filename = os.path.split(caller.filename)
-    first_prefix = "%s(%d): %s" % (filename, caller.lineno, message)
+    # sys._getframe just follows a pointer, unlike inspect.stack which reads source for every frame
+    caller = sys._getframe(1 + frameNudge)
+    first_prefix = "%s(%d): %s" % (_short_filename(caller.f_code.co_filename), caller.f_lineno, message)
     if multiline is None:
         print(first_prefix)
     else:
@@ -44,11 +157,161 @@ def blog(message, multiline=None, frameNudge=0):
             first_prefix = " " * len(first_prefix)
 
 
+##########################################################
+# Profiling. @timed and phase() add call counts and cumulative time to profiler when it's enabled
+# (AOC_TIMING=1, or profiler.enabled = True); when it's off they cost one attribute check.
+# AOC_PROFILE=<prefix> makes run_solver run under cProfile and write <prefix>.collapsed (flamegraph.pl /
+# speedscope import) and <prefix>.speedscope.json.
+
+class Profiler():
+    def __init__(self):
+        self.enabled = os.environ.get('AOC_TIMING', '0') != '0'
+        self.stats = {}  # name -> [calls, seconds]
+
+    def record(self, name: str, seconds: float):
+        entry = self.stats.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def reset(self):
+        self.stats = {}
+
+    def report(self) -> str:
+        lines = [f"{'name':40} {'calls':>8} {'total ms':>12} {'per call ms':>12}"]
+        for name, (calls, seconds) in sorted(self.stats.items(), key=lambda x: -x[1][1]):
+            lines.append(f"{name:40} {calls:8} {seconds * 1000:12.3f} {seconds * 1000 / calls:12.4f}")
+        return "\n".join(lines)
+
+
+profiler = Profiler()
+
+
+def timed(func):
+    # Decorator: count calls to func and their cumulative time while the profiler is enabled
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record(name, time.perf_counter() - start)
+    return wrapper
+
+
+class phase():
+    # with phase("parse"): ... - times the block under that name while the profiler is enabled
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if profiler.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def collapsed_stacks(stats) -> dict:
+    # Turn cProfile stats into 'outer;inner;leaf' -> microseconds of self time. cProfile only keeps
+    # caller -> callee edges, so deeper stacks split a function's time in proportion to each caller's share.
+    def label(func):
+        filename, line, name = func
+        return f"{name} ({_short_filename(filename)}:{line})"
+
+    callees = defaultdict(list)
+    for func, (_, _, _, cumulative, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees[caller].append((func, edge_cumulative))
+
+    rc = defaultdict(float)
+
+    def walk(func, path, share, seen):
+        _, _, self_time, cumulative, _ = stats.stats[func]
+        path = path + [label(func)]
+        if self_time * share > 0:
+            rc[';'.join(path)] += self_time * share * 1e6
+        for callee, edge_cumulative in callees[func]:
+            callee_cumulative = stats.stats[callee][3]
+            if callee in seen or callee_cumulative <= 0:
+                continue
+            walk(callee, path, share * min(1.0, edge_cumulative / callee_cumulative), seen | {callee})
+
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            walk(func, [], 1.0, {func})
+    return rc
+
+
+def export_profile(stats, prefix: str):
+    stacks = collapsed_stacks(stats)
+    with open(prefix + '.collapsed', 'w') as fh:
+        for stack, micros in sorted(stacks.items()):
+            fh.write(f"{stack} {int(round(micros))}\n")
+
+    frames = []
+    frame_ids = {}
+    samples = []
+    weights = []
+    for stack, micros in stacks.items():
+        sample = []
+        for name in stack.split(';'):
+            if name not in frame_ids:
+                frame_ids[name] = len(frames)
+                frames.append({'name': name})
+            sample.append(frame_ids[name])
+        samples.append(sample)
+        weights.append(micros)
+    speedscope = {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': prefix, 'unit': 'microseconds',
+            'startValue': 0, 'endValue': sum(weights), 'samples': samples, 'weights': weights,
+        }],
+    }
+    with open(prefix + '.speedscope.json', 'w') as fh:
+        json.dump(speedscope, fh)
+
+
+def run_solver(module, part: int, sample=False):
+    # Run one part of a day module (one with load_input and solve), timing the parse and solve phases.
+    # Runs under cProfile and exports the profile when AOC_PROFILE is set, and dumps the trace ring
+    # buffer if the solver fails.
+    prefix = os.environ.get('AOC_PROFILE')
+    if prefix:
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        profile.enable()
+    try:
+        with tracer.dump_on_failure():
+            with phase(f"{module.__name__}.parse"):
+                data = module.load_input(sample)
+            with phase(f"{module.__name__}.solve.{part}"):
+                return module.solve(data, part)
+    finally:
+        if prefix:
+            profile.disable()
+            export_profile(pstats.Stats(profile), f"{prefix}.{module.__name__}.{part}")
+
+
 def find_permutations(input_chars, length=8):
+    from itertools import permutations
     return permutations(input_chars, r=length)
 
 
 def find_combinations(input_chars, length=8):
+    from itertools import combinations_with_replacement
     return combinations_with_replacement(input_chars, r=length)
 
 
@@ -69,35 +332,153 @@ def manhattan_distance(p1, p2):
     return sum([abs(p1[x] - p2[x]) for x in range(len(p1))])
 
 
+NEWLINE = ord('\n')
+WHITESPACE = b' \t\r\n'
+# (row, col) offsets of the cells around a cell - LRUD, and LRUD plus the diagonals
+NEIGHBORS_4 = ((-1, 0), (0, -1), (0, 1), (1, 0))
+NEIGHBORS_8 = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _as_byte(value) -> int:
+    # Cells hold one byte; 1-char strings are stored as their code, small ints as themselves
+    return ord(value) if isinstance(value, str) else int(value)
+
+
+def _checked_index(idx: int, length: int) -> int:
+    # Negative indices count from the end, like a list; anything else out of range is an IndexError
+    if idx < 0:
+        idx += length
+    if not 0 <= idx < length:
+        raise IndexError(f"{idx=} out of range for {length=}")
+    return idx
+
+
+class _CharView():
+    # One row or column of a Data2D, read and written as 1-char strings. Nothing is copied; reads and
+    # writes go through to the owning grid, so data[r][c] = '#' still works.
+    def __init__(self, owner, row=None, col=None):
+        self._owner = owner
+        self._row = row
+        self._col = col
+
+    def __getitem__(self, idx):
+        # Reads come from the owner's row strings, so indexing, negative indices and slices are plain str ones
+        rows = self._owner._rows or self._owner._text()
+        if self._col is None:
+            return rows[self._row][idx]
+        if isinstance(idx, slice):
+            return ''.join(row[self._col] for row in rows[idx])
+        return rows[idx][self._col]
+
+    def __setitem__(self, idx: int, value):
+        idx = _checked_index(idx, len(self))
+        cell = (self._row, idx) if self._col is None else (idx, self._col)
+        self._owner._store(*cell, _as_byte(value))
+
+    def __len__(self):
+        return self._owner.num_cols() if self._col is None else self._owner.num_rows()
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __str__(self):
+        if self._col is None:
+            return self._owner._text()[self._row]
+        return self.values.tobytes().decode('latin-1')
+
+    @property
+    def values(self) -> np.ndarray:
+        # The underlying uint8 cells - a zero-copy (strided, for columns) view of the grid, padding included
+        grid = self._owner.as_array()
+        return grid[self._row] if self._col is None else grid[:, self._col]
+
+
 class Data2D():
     # Helper class for problems that use 2D data - maps and the like.
+    # Cells are one byte each in a uint8 array, memory-mapped straight from the input file when the lines
+    # are all the same length, and read back as 1-char strings so data[r][c] == '#' style code still works.
     def __init__(self):
-        self._data = [[]]
+        self._grid = np.zeros((1, 0), dtype=np.uint8)
+        self._pad = 0
+        self._pad_fill = 0
+        self._changed()
 
     def load(self, problem_number: int, sample=True, strip=True, fill=0):
         zero_padded = f"{problem_number:02}"
         sample_file = f'./data/{zero_padded}s.txt'
         data_file = f'./data/{zero_padded}.txt'
-        if sample:
-            raw_lines = open(sample_file, 'r').readlines()
-        else:
-            raw_lines = open(data_file, 'r',).readlines()
-        if strip:
-            data_lines = clean_lines(raw_lines)
-        else:
-            data_lines = raw_lines
-        n_rows = len(data_lines)
-        n_cols = len(data_lines[0])
-        self.fill(n_rows, n_cols, fill)
+        # Copy-on-write, so writing to a cell never touches the file
+        raw = np.memmap(sample_file if sample else data_file, dtype=np.uint8, mode='c')
+        self._pad = 0
+        self._changed()
+
+        ends = np.flatnonzero(raw == NEWLINE)
+        if len(ends) == 0 or ends[-1] != len(raw) - 1:
+            ends = np.append(ends, len(raw))
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        widths = ends - starts
+        width = int(widths[0])
+        uniform = width > 0 and (widths == width).all()
+        if uniform and strip:
+            # Stripping would only change anything if a line starts or ends with whitespace
+            edges = np.concatenate((raw[starts], raw[ends - 1]))
+            uniform = not np.isin(edges, np.frombuffer(WHITESPACE, dtype=np.uint8)).any()
+        if uniform:
+            # Zero-copy: step over the newline at the end of each line
+            self._grid = np.lib.stride_tricks.as_strided(raw, shape=(len(starts), width), strides=(width + 1, 1))
+            return
+
+        # Ragged lines - pad them out with fill, which costs one copy
+        lines = raw.tobytes().decode('latin-1').split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        self.load_lines(lines, strip=strip, fill=fill)
+
+    def load_lines(self, lines: list, strip=True, fill=0):
+        # Load from a list of strings instead of a file, padding short lines out with fill
+        data_lines = clean_lines(lines) if strip else lines
+        self.fill(len(data_lines), max(len(x) for x in data_lines), fill)
         for row, line in enumerate(data_lines):
-            for col, char in enumerate(line):
-                if char == '\n':
-                    continue
-                self._data[row][col] = char
+            self._grid[row, :len(line)] = np.frombuffer(line.encode('latin-1'), dtype=np.uint8)
+
+    @property
+    def grid(self) -> np.ndarray:
+        # The loaded cells as a uint8 array, without any padding
+        return self._grid
+
+    def as_array(self) -> np.ndarray:
+        # The whole grid as a uint8 array, padding included. Only padded grids need a copy, which is made
+        # once and kept, read-only, until the next write.
+        if not self._pad:
+            return self._grid
+        if self._padded is None:
+            self._padded = np.pad(self._grid, self._pad, constant_values=self._pad_fill)
+            self._padded.flags.writeable = False
+        return self._padded
+
+    def _text(self) -> list:
+        # Every row, padding included, as a str. Built on the first per-cell read, so data[r][c] costs a
+        # list and a str index; _store keeps it up to date and whole-grid writes drop it.
+        if self._rows is None:
+            num_rows, num_cols = self.dimensions()
+            flat = self.as_array().tobytes().decode('latin-1')
+            self._rows = [flat[x * num_cols:(x + 1) * num_cols] for x in range(num_rows)]
+        return self._rows
+
+    def _row_views(self) -> list:
+        if self._views is None:
+            self._views = [_CharView(self, row=row) for row in range(self.num_rows())]
+        return self._views
+
+    def _changed(self):
+        self._padded = None
+        self._rows = None
+        self._views = None
 
     def dimensions(self) -> tuple:
         # return num_rows, num_cols
-        return len(self._data), len(self._data[0])
+        num_rows, num_cols = self._grid.shape
+        return num_rows + 2 * self._pad, num_cols + 2 * self._pad
 
     def num_rows(self):
         return self.dimensions()[0]
@@ -106,35 +487,273 @@ class Data2D():
         return self.dimensions()[1]
 
     def fill(self, num_rows: int, num_cols: int, fill=0):
-        # Fill can be any scalar data type eg int, character, float
-        self._data = [[fill] * num_cols for _ in range(num_rows)]
+        # Fill can be a character or a small int
+        self._grid = np.full((num_rows, num_cols), _as_byte(fill), dtype=np.uint8)
+        self._pad = 0
+        self._changed()
 
     def add_padding(self, fill=0):
-        # Add an empty row and column all around. Useful for edge cases. Modifies the array in place.
-        old = self._data
-        old_dims = self.dimensions()
-        self.fill(old_dims[0] + 2, old_dims[1] + 2, fill=fill)
-        for row in range(old_dims[0]):
-            for col in range(old_dims[1]):
-                self._data[row + 1][col + 1] = old[row][col]
+        # Add an empty row and column all around. Useful for edge cases. The border isn't stored, it's
+        # an offset applied on access; it only gets materialized if someone writes into it.
+        if self._pad and _as_byte(fill) != self._pad_fill:
+            self._materialize()
+        self._pad += 1
+        self._pad_fill = _as_byte(fill)
+        self._changed()
+
+    def _materialize(self):
+        # The cells don't change, so the row strings stay valid
+        self._grid = self.as_array().copy()
+        self._pad = 0
+        self._padded = None
+
+    def _store(self, row: int, col: int, value: int):
+        num_rows, num_cols = self._grid.shape
+        if self._pad and not (self._pad <= row < num_rows + self._pad and self._pad <= col < num_cols + self._pad):
+            self._materialize()
+        self._grid[row - self._pad, col - self._pad] = value
+        self._padded = None
+        if self._rows is not None:
+            text = self._rows[row]
+            self._rows[row] = text[:col] + chr(value) + text[col + 1:]
 
     def column(self, index: int):
-        return [row[index] for row in self._data]
+        return _CharView(self, col=_checked_index(index, self.num_cols()))
+
+    # Whole-grid operations. These work on every cell at once with array shifts, so grid puzzles don't
+    # need per-cell neighbour loops. Cells off the edge count as fill.
+    def mask(self, char) -> np.ndarray:
+        # Boolean array, True where the cell holds char
+        return self.as_array() == _as_byte(char)
+
+    def shifted(self, d_row: int, d_col: int, fill=0) -> np.ndarray:
+        # Array where [r, c] holds the cell at (r + d_row, c + d_col)
+        grid = self.as_array()
+        num_rows, num_cols = grid.shape
+        rc = np.full_like(grid, _as_byte(fill))
+        dst_rows = slice(max(0, -d_row), min(num_rows, num_rows - d_row))
+        dst_cols = slice(max(0, -d_col), min(num_cols, num_cols - d_col))
+        src_rows = slice(max(0, d_row), min(num_rows, num_rows + d_row))
+        src_cols = slice(max(0, d_col), min(num_cols, num_cols + d_col))
+        rc[dst_rows, dst_cols] = grid[src_rows, src_cols]
+        return rc
+
+    def neighbor_count(self, char, diagonals=True) -> np.ndarray:
+        # For every cell, how many of its 4 (or 8 with diagonals) neighbours hold char
+        bordered = np.pad(self.mask(char), 1).astype(np.uint8)
+        num_rows, num_cols = self.dimensions()
+        counts = np.zeros((num_rows, num_cols), dtype=np.uint8)
+        for d_row, d_col in (NEIGHBORS_8 if diagonals else NEIGHBORS_4):
+            counts += bordered[1 + d_row:1 + d_row + num_rows, 1 + d_col:1 + d_col + num_cols]
+        return counts
+
+    def update(self, where: np.ndarray, char):
+        # Set every cell where the boolean mask is True to char, in place
+        if self._pad:
+            self._materialize()
+        self._grid[where] = _as_byte(char)
+        self._changed()
 
     def __getitem__(self, item):
-        return self._data[item]
+        # Row views are made once, so data[r][c] is two list lookups and a str index
+        if isinstance(item, tuple):
+            return (self._rows or self._text())[item[0]][item[1]]
+        return (self._views or self._row_views())[item]
+
+    def __len__(self):
+        return self.num_rows()
+
+    def __iter__(self):
+        # Row views, top to bottom, so a grid iterates like the list of lists it replaced
+        return iter(self._row_views())
 
     def __str__(self):
-        rc = ''
-        num_rows, num_cols = self.dimensions()
-        for row in range(num_rows):
-            pstr = '"'
-            for col in range(num_cols):
-                pstr += self._data[row][col]
-            pstr += '"'
-            rc += pstr + '\n'
+        return ''.join(f'"{row.tobytes().decode("latin-1")}"\n' for row in self.as_array())
+
+
+class IntervalSet():
+    # Sorted, merged set of inclusive integer ranges. Build once, then query membership cheaply.
+    def __init__(self, ranges=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted((min(x), max(x)) for x in ranges):
+            # Merge overlapping and touching ranges - [3, 5] and [6, 8] cover the same IDs as [3, 8]
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+        self._np_bounds = None
+
+    def __contains__(self, value: int) -> bool:
+        idx = bisect_right(self.starts, value) - 1
+        return idx >= 0 and value <= self.ends[idx]
+
+    def contains_many(self, values) -> np.ndarray:
+        # Vectorized membership test - returns a boolean array the same shape as values
+        values = np.asarray(values, dtype=np.int64)
+        if not self.starts:
+            return np.zeros(values.shape, dtype=bool)
+        if self._np_bounds is None:
+            self._np_bounds = (np.array(self.starts, dtype=np.int64), np.array(self.ends, dtype=np.int64))
+        starts, ends = self._np_bounds
+        idx = np.searchsorted(starts, values, side='right') - 1
+        found = idx >= 0
+        return found & (values <= ends[np.maximum(idx, 0)])
+
+    def total_length(self) -> int:
+        # Number of integers covered by the set
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def __iter__(self):
+        return iter(zip(self.starts, self.ends))
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class DisjointSet():
+    # Union-find over the integers 0..size-1, with path compression and union by size.
+    def __init__(self, size: int):
+        self._parent = list(range(size))
+        self._size = [1] * size
+        self.count = size  # Number of live components
+
+    def find(self, item: int) -> int:
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # Path compression - point everything we walked through straight at the root
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> bool:
+        # Merge the components holding a and b. Returns False if they were already joined.
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        self.count -= 1
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def size(self, item: int) -> int:
+        # Size of the component holding item
+        return self._size[self.find(item)]
+
+    def component_sizes(self) -> list:
+        return [self._size[x] for x in range(len(self._parent)) if self._parent[x] == x]
+
+    def __len__(self):
+        return len(self._parent)
+
+
+class KDTree():
+    # Static k-d tree over integer points for nearest-neighbour and radius queries.
+    # Everything works on squared distances so it stays exact and never needs sqrt.
+    # The tree is implicit: each segment of _order is split at its median on one axis, down to
+    # small leaves that are scanned directly.
+    LEAF_SIZE = 8
+
+    def __init__(self, points: list):
+        self.points = points
+        self.num_dims = len(points[0]) if points else 0
+        self._order = list(range(len(points)))
+        self._build(0, len(points), 0)
+
+    def _build(self, lo: int, hi: int, axis: int):
+        if hi - lo <= self.LEAF_SIZE:
+            return
+        points = self.points
+        self._order[lo:hi] = sorted(self._order[lo:hi], key=lambda x: points[x][axis])
+        mid = (lo + hi) // 2
+        next_axis = (axis + 1) % self.num_dims
+        self._build(lo, mid, next_axis)
+        self._build(mid + 1, hi, next_axis)
+
+    @staticmethod
+    def _distance_squared(a: tuple, b: tuple) -> int:
+        rc = 0
+        for x, y in zip(a, b):
+            rc += (x - y) * (x - y)
         return rc
 
+    def knn(self, point: tuple, k: int, skip=None) -> list:
+        # The k nearest points as a sorted list of (distance squared, index). skip excludes one index,
+        # normally the query point itself.
+        best = []  # max-heap of (-distance squared, -index)
+
+        def offer(idx):
+            if idx != skip:
+                entry = (-self._distance_squared(point, self.points[idx]), -idx)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+
+        def visit(lo, hi, axis):
+            if hi - lo <= self.LEAF_SIZE:
+                for idx in self._order[lo:hi]:
+                    offer(idx)
+                return
+            mid = (lo + hi) // 2
+            idx = self._order[mid]
+            here = self.points[idx]
+            offer(idx)
+            diff = point[axis] - here[axis]
+            next_axis = (axis + 1) % self.num_dims
+            if diff < 0:
+                near, far = (lo, mid), (mid + 1, hi)
+            else:
+                near, far = (mid + 1, hi), (lo, mid)
+            visit(near[0], near[1], next_axis)
+            # Only cross the splitting plane if it's closer than the worst neighbour we have
+            if len(best) < k or diff * diff <= -best[0][0]:
+                visit(far[0], far[1], next_axis)
+
+        if k > 0:
+            visit(0, len(self._order), 0)
+        return sorted((-d, -idx) for d, idx in best)
+
+    def radius(self, point: tuple, radius_squared: int, skip=None) -> list:
+        # Every point within sqrt(radius_squared), as a sorted list of (distance squared, index)
+        found = []
+
+        def offer(idx):
+            if idx != skip:
+                dist = self._distance_squared(point, self.points[idx])
+                if dist <= radius_squared:
+                    found.append((dist, idx))
+
+        def visit(lo, hi, axis):
+            if hi - lo <= self.LEAF_SIZE:
+                for idx in self._order[lo:hi]:
+                    offer(idx)
+                return
+            mid = (lo + hi) // 2
+            idx = self._order[mid]
+            here = self.points[idx]
+            offer(idx)
+            diff = point[axis] - here[axis]
+            next_axis = (axis + 1) % self.num_dims
+            if diff <= 0 or diff * diff <= radius_squared:
+                visit(lo, mid, next_axis)
+            if diff >= 0 or diff * diff <= radius_squared:
+                visit(mid + 1, hi, next_axis)
+
+        visit(0, len(self._order), 0)
+        return sorted(found)
+
+    def __len__(self):
+        return len(self.points)
+
 
 def make_2d_array(num_rows, num_cols, fill=0):
     # Create and allocate a 2D array. Copypasta from SO with edits.
@@ -219,12 +838,271 @@ def get_all_data(problem_number: int) -> tuple:
     return sample, full, p1_answer, p2_answer
 
 
+def get_answers(problem_number: int) -> tuple:
+    # Just the sample answers as (part one, part two), without touching the input files
+    p1_answer = get_data_as_lines(problem_number, suffix='sa')
+    try:
+        p2_answer = get_data_as_lines(problem_number, suffix='p2sa')
+    except FileNotFoundError:
+        p2_answer = None
+    return p1_answer, p2_answer
+
+
+# Parsed-input cache. Parsed inputs are memoized in process (bounded LRU) and on disk under CACHE_DIR,
+# keyed by a hash of the input file's contents plus the parser's name and the source of its module, so
+# editing either one invalidates the entry. Cached objects are shared - parsers that return mutable data hand every
+# caller the same object.
+CACHE_DIR = os.environ.get('AOC_CACHE_DIR', './.cache')
+PARSE_CACHE_SIZE = 32
+PARSE_CACHE = os.environ.get('AOC_PARSE_CACHE', '1') != '0'  # Switch off to always parse, e.g. when benchmarking
+_parse_cache = OrderedDict()
+_digest_cache = {}
+
+
+def file_digest(filename: str) -> str:
+    # sha256 of the file contents, remembered per (path, mtime, size) so unchanged files aren't re-read
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+    if key not in _digest_cache:
+        with open(filename, 'rb') as fh:
+            _digest_cache[key] = hashlib.sha256(fh.read()).hexdigest()
+    return _digest_cache[key]
+
+
+def parser_identity(parser) -> str:
+    # The parser's name plus a hash of the source it lives in, utils.py and any day module it borrows
+    # from, so editing a helper the parser calls invalidates its entries too
+    module = sys.modules.get(parser.__module__)
+    if getattr(module, '__file__', None) is None:
+        # No source file (defined interactively), so hash the bytecode; it doesn't see helpers
+        code = parser.__code__
+        return f"{parser.__module__}.{parser.__qualname__}:{hashlib.sha256(code.co_code).hexdigest()}"
+    return f"{parser.__module__}.{parser.__qualname__}:{source_digest(module)}"
+
+
+def _frozen(value):
+    # Every caller of parsed_input gets the same object, so make it read-only: lists become tuples and
+    # arrays are flagged unwriteable, all the way down. Anything else is handed back as it is.
+    if isinstance(value, (list, tuple)) and type(value) in (list, tuple):
+        return tuple(_frozen(x) for x in value)
+    if 'numpy' in sys.modules and isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    return value
+
+
+def _cache_slot(problem_number: int, suffix: str, identity: str) -> str:
+    # Files for one input and parser share this prefix, whatever the input's and parser's contents, so
+    # writing a new entry can delete the ones it replaces
+    name = identity.split(':')[0]
+    return hashlib.sha256(f"{zero_pad(problem_number)}{suffix}:{name}".encode()).hexdigest()[:16]
+
+
+def _prune_cache_files(directory: str, slot: str, keep: str):
+    # Remove every file in slot except keep, including temporaries left by a killed writer
+    for filename in os.listdir(directory):
+        if filename.startswith(slot + '-') and not filename.startswith(keep + '.'):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def _read_cache_file(cache_file: str) -> tuple:
+    # (True, cached parse) or (False, None). A file that can't be loaded - truncated by a killed
+    # writer, say - counts as a miss and is deleted so it gets rewritten.
+    for path in (cache_file + '.npy', cache_file + '.pkl'):
+        if not os.path.exists(path):
+            continue
+        try:
+            if path.endswith('.npy'):
+                return True, np.load(path)
+            with open(path, 'rb') as fh:
+                return True, pickle.load(fh)
+        except Exception as exc:
+            log.warning("discarding unreadable cache file %s: %s", path, exc)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return False, None
+
+
+def _write_cache_file(cache_file: str, value):
+    # Written to a temporary file and renamed into place, so other processes (run_all.py runs both parts
+    # of a day at once) only ever see a missing or a complete file
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(cache_file))
+    os.makedirs(directory, exist_ok=True)
+    # Only arrays go to .npy, and a parser that returned one has already imported numpy
+    is_array = 'numpy' in sys.modules and isinstance(value, np.ndarray) and value.dtype != object
+    fd, temp_name = tempfile.mkstemp(dir=directory, prefix=os.path.basename(cache_file) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            if is_array:
+                np.save(fh, value)
+            else:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_name, cache_file + ('.npy' if is_array else '.pkl'))
+    except BaseException:
+        # Including a timeout's alarm going off mid-write
+        os.remove(temp_name)
+        raise
+
+
+def parsed_input(problem_number: int, parser=None, sample=True):
+    # Lines of the sample or full input (only the one asked for), run through parser and cached.
+    # With no parser you get the cleaned lines, same as get_data_lines. The result is shared between
+    # callers, so it comes back read-only, see _frozen. Only the newest entry for each input and parser
+    # is kept on disk.
+    suffix = 's' if sample else ''
+    if not PARSE_CACHE:
+        lines = get_data_as_lines(problem_number, suffix=suffix)
+        return parser(lines) if parser else lines
+
+    filename = f'./data/{zero_pad(problem_number)}{suffix}.txt'
+    identity = parser_identity(parser) if parser else 'lines'
+    key = hashlib.sha256(f"{file_digest(filename)}:{identity}".encode()).hexdigest()
+
+    if key in _parse_cache:
+        _parse_cache.move_to_end(key)
+        return _parse_cache[key]
+
+    slot = _cache_slot(problem_number, suffix, identity)
+    cache_file = os.path.join(CACHE_DIR, f"{slot}-{key}")
+    found, rc = _read_cache_file(cache_file)
+    if found:
+        rc = _frozen(rc)
+    else:
+        lines = get_data_as_lines(problem_number, suffix=suffix)
+        rc = _frozen(parser(lines) if parser else lines)
+        _write_cache_file(cache_file, rc)
+        _prune_cache_files(CACHE_DIR, slot, os.path.basename(cache_file))
+
+    _parse_cache[key] = rc
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+    return rc
+
+
+# Result cache. Answers are stored in a SQLite file under CACHE_DIR with how long they took, keyed by
+# the day, part, a hash of the input file and a hash of the solver's source plus utils.py (and any other
+# day module it borrows from). Editing a solver only misses for that solver's entries; editing utils.py
+# misses for all of them. Stale rows are replaced as each key is re-solved.
+RESULT_CACHE = os.environ.get('AOC_RESULT_CACHE', '1') != '0'
+
+
+def source_digest(module) -> str:
+    # sha256 of the module's source, utils.py and any sibling module it imported names from
+    here = os.path.dirname(os.path.abspath(module.__file__))
+    names = {module.__name__, __name__}
+    for value in vars(module).values():
+        names.add(getattr(value, '__module__', None) or getattr(value, '__name__', None))
+    files = set()
+    for name in names:
+        filename = getattr(sys.modules.get(name), '__file__', None)
+        if filename and os.path.dirname(os.path.abspath(filename)) == here:
+            files.add(os.path.abspath(filename))
+    return hashlib.sha256(''.join(file_digest(x) for x in sorted(files)).encode()).hexdigest()
+
+
+class ResultCache():
+    SCHEMA = """CREATE TABLE IF NOT EXISTS results (
+        day INTEGER, module TEXT, part INTEGER, sample INTEGER, input_digest TEXT, source_digest TEXT,
+        answer TEXT, seconds REAL, created REAL,
+        PRIMARY KEY (day, module, part, sample))"""
+
+    def __init__(self, filename=None):
+        self.filename = filename or os.path.join(CACHE_DIR, 'results.sqlite')
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(os.path.abspath(self.filename)), exist_ok=True)
+            # Parallel runs write from several processes, so wait on a locked database instead of failing
+            self._db = sqlite3.connect(self.filename, timeout=30)
+            self._db.execute(self.SCHEMA)
+        return self._db
+
+    def _key(self, module, day: int, part: int, sample: bool) -> tuple:
+        input_file = f'./data/{zero_pad(day)}{"s" if sample else ""}.txt'
+        return day, module.__name__, part, int(sample), file_digest(input_file), source_digest(module)
+
+    def get(self, module, day: int, part: int, sample=False):
+        # (answer, seconds, created) for an up to date entry, otherwise None. Answers come back as strings.
+        key = self._key(module, day, part, sample)
+        return self._connect().execute(
+            "SELECT answer, seconds, created FROM results WHERE day = ? AND module = ? AND part = ? AND sample = ? "
+            "AND input_digest = ? AND source_digest = ?", key).fetchone()
+
+    def put(self, module, day: int, part: int, sample: bool, answer, seconds: float):
+        # Overwrites whatever was stored for this day, module, part and dataset, so stale rows don't pile up
+        db = self._connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       self._key(module, day, part, sample) + (str(answer), seconds, time.time()))
+
+    def solve(self, module, day: int, part: int, sample=False, use_cache=True) -> tuple:
+        # (answer, cached) - the stored answer if neither the input nor the source changed, otherwise
+        # run_solver's answer, which is then stored. use_cache=False always solves but still stores.
+        # The answer is a string either way, as it comes back from the database.
+        if use_cache and RESULT_CACHE:
+            hit = self.get(module, day, part, sample)
+            if hit:
+                return hit[0], True
+        start = time.perf_counter()
+        answer = run_solver(module, part, sample=sample)
+        if RESULT_CACHE:
+            self.put(module, day, part, sample, answer, time.perf_counter() - start)
+        return str(answer), False
+
+    def clear(self):
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM results")
+
+
+results = ResultCache()
+
+
 def product(inp: list):
     # Return the multiplicative product of a list / iterable of numbers
     # from https://stackoverflow.com/questions/595374/whats-the-function-like-sum-but-for-multiplication-product
     return reduce(operator.mul, inp, 1)
 
 
+# Anything at or past this might have wrapped in int64, so it gets redone with Python ints
+OVERFLOW_GUARD = 2 ** 62
+
+
+def reduce_blocks(operands, offsets, ops) -> list:
+    # Segmented sum/product. operands is one flat array of ints, offsets are the block start indices
+    # and ops has one '+' or '*' per block. All blocks are evaluated at once with reduceat; any block
+    # whose magnitude (estimated in float64) could overflow int64 is recomputed exactly.
+    operands = np.asarray(operands, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    is_mul = np.array([x == '*' for x in ops], dtype=bool)
+    lengths = np.diff(np.append(offsets, len(operands)))
+    # Empty blocks get the identity; reduceat can't express them
+    rc = np.where(is_mul, 1, 0).astype(object)
+    present = np.flatnonzero(lengths > 0)
+    if len(present) == 0:
+        return rc.tolist()
+
+    starts = offsets[present]
+    magnitudes = np.abs(operands).astype(np.float64)
+    block_mul = is_mul[present]
+    values = np.where(block_mul, np.multiply.reduceat(operands, starts), np.add.reduceat(operands, starts))
+    with np.errstate(over='ignore'):
+        estimates = np.where(block_mul, np.multiply.reduceat(magnitudes, starts), np.add.reduceat(magnitudes, starts))
+    rc[present] = values.tolist()
+
+    for idx in present[estimates >= OVERFLOW_GUARD]:
+        block = operands[offsets[idx]:offsets[idx] + lengths[idx]].tolist()
+        rc[idx] = product(block) if is_mul[idx] else sum(block)
+    return rc.tolist()
+
+
 # Pick's theorem and the shoelace formula
 # https://en.wikipedia.org/wiki/Pick%27s_theorem
 # https://en.wikipedia.org/wiki/Shoelace_formula
@@ -292,7 +1170,7 @@ def to_adjacency(map):
     print(f"{num_cols} cols and {num_rows} rows == {num_cells}^2 in adjacency matrix")
     # Avert your eyes.
     zero_row = [0 for x in range(num_cells)]
-    adj_matrix = [deepcopy(zero_row) for y in range(num_cells)]
+    adj_matrix = [zero_row.copy() for y in range(num_cells)]
 
     for row_idx in range(num_cells):
         for col_idx in range(num_cells):
@@ -390,24 +1268,237 @@ class Graph:
 # }
 
 
-def dijkstra(graph, start: str):
-    result_map = defaultdict(lambda: float('inf'))
-    result_map[start] = 0
-
-    visited = set()
+class Distances(dict):
+    # label -> distance, where anything unreachable reads as inf without being added to the dict
+    def __missing__(self, key):
+        return float('inf')
+
+
+class CSRGraph():
+    # A weighted directed graph compiled once from the dict-of-lists format above. Labels are mapped to
+    # dense integer ids and edges are stored compressed-sparse-row style: the edges leaving node i are
+    # targets[offsets[i]:offsets[i + 1]] with matching weights. Queries then never hash a label.
+    def __init__(self, graph: dict):
+        self.labels = list(graph)
+        self.ids = {label: idx for idx, label in enumerate(self.labels)}
+        for edges in graph.values():
+            for label, _ in edges:
+                if label not in self.ids:
+                    self.ids[label] = len(self.labels)
+                    self.labels.append(label)
+        self.offsets = [0]
+        self.targets = []
+        self.weights = []
+        for label in self.labels:
+            for target, weight in graph.get(label, ()):
+                self.targets.append(self.ids[target])
+                self.weights.append(weight)
+            self.offsets.append(len(self.targets))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def search(self, sources, targets=()) -> tuple:
+        # Dijkstra from one or more source ids. Stops once every id in targets is settled.
+        # Returns flat (dist, pred, settled) lists; pred is -1 for sources and unreachable nodes. Only
+        # settled nodes have final distances - after an early stop the rest may just be upper bounds.
+        num_nodes = len(self.labels)
+        dist = [float('inf')] * num_nodes
+        pred = [-1] * num_nodes
+        settled = [False] * num_nodes
+        remaining = set(targets)
+        queue = []
+        for idx in sources:
+            dist[idx] = 0
+            queue.append((0, idx))
+        heapq.heapify(queue)
+        offsets, edge_targets, weights = self.offsets, self.targets, self.weights
+        while queue:
+            weight, idx = heapq.heappop(queue)
+            # Lazy deletion - a node can be queued several times, only its first pop counts
+            if settled[idx]:
+                continue
+            settled[idx] = True
+            if remaining:
+                remaining.discard(idx)
+                if not remaining:
+                    break
+            for edge in range(offsets[idx], offsets[idx + 1]):
+                n_idx = edge_targets[edge]
+                candidate = weight + weights[edge]
+                if candidate < dist[n_idx]:
+                    dist[n_idx] = candidate
+                    pred[n_idx] = idx
+                    heapq.heappush(queue, (candidate, n_idx))
+        return dist, pred, settled
+
+    def distances(self, sources, targets=None) -> Distances:
+        # Label-level wrapper around search. sources/targets may be a single label or a list/set of them.
+        # Holds every node whose distance is final, which with targets is the targets and whatever was
+        # settled on the way to them.
+        sources = sources if isinstance(sources, (list, set)) else [sources]
+        if targets is None:
+            targets = []
+        elif not isinstance(targets, (list, set)):
+            targets = [targets]
+        dist, _, settled = self.search([self.ids[x] for x in sources], [self.ids[x] for x in targets])
+        return Distances((self.labels[idx], value) for idx, value in enumerate(dist) if settled[idx])
+
+    def path(self, pred: list, target: int) -> list:
+        # Walk the predecessor list back from target id; returns labels from source to target
+        rc = []
+        while target != -1:
+            rc.append(self.labels[target])
+            target = pred[target]
+        return rc[::-1]
+
+    def shortest_path(self, source, target) -> tuple:
+        # (cost, [labels]) of the cheapest route, or (inf, []) if there isn't one
+        dist, pred, _ = self.search([self.ids[source]], [self.ids[target]])
+        target_idx = self.ids[target]
+        if dist[target_idx] == float('inf'):
+            return float('inf'), []
+        return dist[target_idx], self.path(pred, target_idx)
 
-    queue = [(0, start)]
 
-    while queue:
-        weight, v = heapq.heappop(queue)
-        visited.add(v)
+def dijkstra(graph, start: str):
+    # Kept for the old call sites - compile and search once. Build a CSRGraph directly for repeated queries.
+    return CSRGraph(graph).distances(start)
 
-        for u, w in graph[v]:
-            if u not in visited:
-                result_map[u] = min(w + weight, result_map[u])
-                heapq.heappush(queue, [w + weight, u])
 
-    return result_map
+# print(dijkstra(graph, 'A'))
 
+##########################################################
+# Shortest paths on a grid without building the graph. Neighbours are generated on the fly from the
+# cell values, and dist/visited live in flat per-cell lists, so memory is O(cells) instead of the
+# (rows * cols)^2 adjacency matrix above.
+
+def unit_cost(source_value, dest_value):
+    # Default edge cost - every step costs one and every cell is passable
+    return 1
+
+
+class GridGraph():
+    # cost(source value, dest value) returns the price of stepping between two adjacent cells, or None
+    # if the step isn't allowed. Cells are addressed by flat index (row * num_cols + col) or (row, col).
+    # Character grids - a Data2D, a list of row strings or a list of lists - all hand cost() 1-char strings.
+    def __init__(self, grid, cost=unit_cost, diagonals=False, min_cost=1):
+        if isinstance(grid, Data2D):
+            grid = grid.as_array().view('S1').astype('U1')
+        elif isinstance(grid, list):
+            grid = [list(row) if isinstance(row, str) else row for row in grid]
+        grid = np.asarray(grid)
+        self.num_rows, self.num_cols = grid.shape
+        self.num_cells = self.num_rows * self.num_cols
+        self.values = grid.ravel().tolist()
+        self.cost = cost
+        self.diagonals = diagonals
+        self.offsets = NEIGHBORS_8 if diagonals else NEIGHBORS_4
+        # Smallest possible step cost, used to keep the A* heuristic admissible
+        self.min_cost = min_cost
+
+    def index(self, cell) -> int:
+        if isinstance(cell, tuple):
+            return cell[0] * self.num_cols + cell[1]
+        return cell
+
+    def position(self, idx: int) -> tuple:
+        return divmod(idx, self.num_cols)
+
+    def neighbors(self, idx: int):
+        # Yield (neighbour index, step cost) for every allowed step out of idx
+        row, col = divmod(idx, self.num_cols)
+        value = self.values[idx]
+        for d_row, d_col in self.offsets:
+            n_row = row + d_row
+            n_col = col + d_col
+            if 0 <= n_row < self.num_rows and 0 <= n_col < self.num_cols:
+                n_idx = n_row * self.num_cols + n_col
+                step = self.cost(value, self.values[n_idx])
+                if step is not None:
+                    yield n_idx, step
+
+    def _sources(self, start) -> list:
+        if isinstance(start, (int, tuple)):
+            start = [start]
+        return [self.index(x) for x in start]
+
+    def bfs(self, start, target=None) -> list:
+        # Unit-weight shortest paths - only passability from cost() matters. Returns flat distances,
+        # inf where unreachable; stops early once target is reached.
+        target = None if target is None else self.index(target)
+        dist = [float('inf')] * self.num_cells
+        frontier = self._sources(start)
+        for idx in frontier:
+            dist[idx] = 0
+        steps = 0
+        while frontier and (target is None or dist[target] == float('inf')):
+            steps += 1
+            next_frontier = []
+            for idx in frontier:
+                for n_idx, _ in self.neighbors(idx):
+                    if dist[n_idx] == float('inf'):
+                        dist[n_idx] = steps
+                        next_frontier.append(n_idx)
+            frontier = next_frontier
+        return dist
 
-# print(dijkstra(graph, 'A'))
\ No newline at end of file
+    def dijkstra(self, start, target=None) -> list:
+        # Weighted shortest paths with a binary heap. Returns flat distances, inf where unreachable.
+        # With a target the search stops once it's settled, and anything not settled by then reads as
+        # inf rather than an upper bound, the same as CSRGraph.distances.
+        target = None if target is None else self.index(target)
+        dist = [float('inf')] * self.num_cells
+        visited = [False] * self.num_cells
+        queue = []
+        for idx in self._sources(start):
+            dist[idx] = 0
+            queue.append((0, idx))
+        heapq.heapify(queue)
+        while queue:
+            weight, idx = heapq.heappop(queue)
+            if visited[idx]:
+                continue
+            visited[idx] = True
+            if idx == target:
+                break
+            for n_idx, step in self.neighbors(idx):
+                candidate = weight + step
+                if candidate < dist[n_idx]:
+                    dist[n_idx] = candidate
+                    heapq.heappush(queue, (candidate, n_idx))
+        return [value if settled else float('inf') for value, settled in zip(dist, visited)]
+
+    def astar(self, start, goal) -> float:
+        # Cost of the cheapest path from start to goal, guided by the fewest steps it could take: the
+        # Manhattan distance, or the Chebyshev distance when diagonal steps are allowed. inf if none.
+        goal = self.index(goal)
+        goal_row, goal_col = self.position(goal)
+        diagonals = self.diagonals
+
+        def heuristic(idx):
+            row, col = divmod(idx, self.num_cols)
+            d_row = abs(row - goal_row)
+            d_col = abs(col - goal_col)
+            return (max(d_row, d_col) if diagonals else d_row + d_col) * self.min_cost
+
+        dist = [float('inf')] * self.num_cells
+        visited = [False] * self.num_cells
+        queue = []
+        for idx in self._sources(start):
+            dist[idx] = 0
+            queue.append((heuristic(idx), idx))
+        heapq.heapify(queue)
+        while queue:
+            _, idx = heapq.heappop(queue)
+            if visited[idx]:
+                continue
+            if idx == goal:
+                return dist[idx]
+            visited[idx] = True
+            for n_idx, step in self.neighbors(idx):
+                candidate = dist[idx] + step
+                if candidate < dist[n_idx]:
+                    dist[n_idx] = candidate
+                    heapq.heappush(queue, (candidate + heuristic(n_idx), n_idx))
+        return float('inf')